@@ -0,0 +1,144 @@
+from meta import GameMeta
+
+
+# Bitboard giống minimax_solv/position.py: bit (col * (ROWS + 1) + row), row 0 là hàng DƯỚI cùng,
+# mỗi cột có thêm một bit trống phía trên để phép dịch không tràn sang cột bên cạnh.
+H1 = GameMeta.ROWS + 1
+BOTTOM = [1 << (col * H1) for col in range(GameMeta.COLS)]
+TOP = [1 << (col * H1 + GameMeta.ROWS - 1) for col in range(GameMeta.COLS)]
+COLUMN = [((1 << GameMeta.ROWS) - 1) << (col * H1) for col in range(GameMeta.COLS)]
+FULL_MASK = sum(COLUMN)
+BOTTOM_ROW = sum(BOTTOM)
+ALL_COLUMNS = (1 << GameMeta.COLS) - 1
+LEGAL_MOVES = [[col for col in range(GameMeta.COLS) if legal >> col & 1] for legal in range(ALL_COLUMNS + 1)]
+_V, _H, _D1, _D2 = 1, H1, H1 - 1, H1 + 1 # Bước dịch: dọc, ngang và hai đường chéo
+
+
+def has_alignment(bits: int) -> bool:
+    """True if `bits` contains 4 in a row (shift-and-mask, như Position.has_alignment)."""
+    m = bits & (bits >> _H)
+    if m & (m >> (2 * _H)):
+        return True
+    m = bits & (bits >> _D1)
+    if m & (m >> (2 * _D1)):
+        return True
+    m = bits & (bits >> _D2)
+    if m & (m >> (2 * _D2)):
+        return True
+    m = bits & (bits >> _V)
+    return bool(m & (m >> (2 * _V)))
+
+
+def winning_cells(bits: int, mask: int) -> int:
+    """Empty cells that would complete 4 in a row for `bits` (Position.compute_winning_position)."""
+    r = (bits << 1) & (bits << 2) & (bits << 3) # Dọc: chỉ cần 3 quân phía dưới
+    for s in (_H, _D1, _D2):
+        p = (bits << s) & (bits << (2 * s))
+        r |= p & (bits << (3 * s))
+        r |= p & (bits >> s)
+        p = (bits >> s) & (bits >> (2 * s))
+        r |= p & (bits << s)
+        r |= p & (bits >> (3 * s))
+    return r & (FULL_MASK ^ mask)
+
+
+class BitConnectState:
+    """
+    Drop-in replacement for ConnectState backed by two bitboards: moves and
+    win checks are a few integer operations instead of list-of-lists walks.
+    `height`, `last_played` and `board` keep ConnectState's meaning
+    (board[0] is the top row, height[col] is the next free row, -1 when full).
+    """
+
+    def __init__(self):
+        self.bits = [0, 0, 0] # Bitboard theo mã người chơi (chỉ số 1 và 2)
+        self.mask = 0
+        self.to_play = GameMeta.PLAYERS['one']
+        self.height = [GameMeta.ROWS - 1] * GameMeta.COLS
+        self.last_played = []
+        # Cập nhật trong move(): cột còn đi được (bit col) và kết quả ván (OUTCOMES)
+        self.legal = ALL_COLUMNS
+        self.outcome = GameMeta.OUTCOMES['none']
+
+    @property
+    def board(self):
+        board = [[0] * GameMeta.COLS for _ in range(GameMeta.ROWS)]
+        for player in (GameMeta.PLAYERS['one'], GameMeta.PLAYERS['two']):
+            bits = self.bits[player]
+            for col in range(GameMeta.COLS):
+                for row in range(GameMeta.ROWS):
+                    if bits >> (col * H1 + row) & 1:
+                        board[GameMeta.ROWS - 1 - row][col] = player
+        return board
+
+    def get_board(self):
+        return self.board
+
+    def copy(self):
+        """Cheap copy (a few ints and two short lists), used instead of deepcopy by the agents."""
+        new = BitConnectState.__new__(BitConnectState)
+        new.bits = self.bits[:]
+        new.mask = self.mask
+        new.to_play = self.to_play
+        new.height = self.height[:]
+        new.last_played = self.last_played[:]
+        new.legal = self.legal
+        new.outcome = self.outcome
+        return new
+
+    def key(self):
+        """Unique position key (Position.key of minimax_solv: stones of the player to move + mask)."""
+        return self.bits[self.to_play] + self.mask
+
+    def move(self, col):
+        row = self.height[col]
+        bit = 1 << (col * H1 + GameMeta.ROWS - 1 - row)
+        player = self.to_play
+        self.bits[player] |= bit
+        self.mask |= bit
+        self.last_played = [row, col]
+        self.height[col] = row - 1
+        if row == 0:
+            self.legal &= ~(1 << col)
+        # Chỉ người vừa đi có thể vừa tạo được 4 quân liên tiếp; ván đã kết thúc thì giữ kết quả đầu tiên
+        if self.outcome != GameMeta.OUTCOMES['none']:
+            pass
+        elif has_alignment(self.bits[player]):
+            self.outcome = player
+        elif self.mask == FULL_MASK:
+            self.outcome = GameMeta.OUTCOMES['draw']
+        self.to_play = 3 - player # PLAYERS: 1 <-> 2
+
+    def get_legal_moves(self):
+        return LEGAL_MOVES[self.legal][:] # Bản sao: roll_out của RAVE sửa trực tiếp danh sách
+
+    def check_win(self):
+        return self.outcome if self.outcome != GameMeta.OUTCOMES['draw'] else 0
+
+    def game_over(self):
+        return self.outcome != GameMeta.OUTCOMES['none']
+
+    def get_outcome(self):
+        """Winner, OUTCOMES['draw'], or OUTCOMES['none'] while the game goes on."""
+        return self.outcome
+
+    def would_lose(self, col, player):
+        """True if, after `col` is played, the opponent of `player` can win immediately."""
+        opponent = (GameMeta.PLAYERS['two'] if player == GameMeta.PLAYERS['one']
+                    else GameMeta.PLAYERS['one'])
+        if opponent == self.to_play: # Như ConnectState: nước trả lời là của `player`, không phải đối thủ
+            return False
+        mask = self.mask | ((self.mask + BOTTOM[col]) & COLUMN[col])
+        playable = (mask + BOTTOM_ROW) & FULL_MASK # Ô đi được tiếp theo của mỗi cột chưa đầy
+        return bool(winning_cells(self.bits[opponent], mask) & playable)
+
+    def print(self):
+        print('=============================')
+
+        board = self.board
+        for row in range(GameMeta.ROWS):
+            for col in range(GameMeta.COLS):
+                print('| {} '.format('X' if board[row][col] == 1 else 'O' if board[row][col] == 2 else ' '), end='')
+            print('|')
+
+        print('=============================')
@@ -1,10 +1,9 @@
 import time
 import random
-from copy import deepcopy
 import sys
 
 from meta import GameMeta, MCTSMeta
-from ConnectState import ConnectState
+from BitConnectState import BitConnectState
 
 class Connect4Interface:
     """
@@ -23,9 +22,9 @@ class Connect4Interface:
         agent_class: e.g. Connect4MCTSAgent, RaveMctsAgent, etc.
         movetime: default time for each move (can be used by agent if the agent is time-based).
         """
-        self.game = ConnectState()  # The Connect Four board
+        self.game = BitConnectState()  # The Connect Four board
         self.AgentClass = agent_class
-        self.agent = agent_class(deepcopy(self.game))  # An instance of the agent
+        self.agent = agent_class(self.game.copy())  # An instance of the agent
         self.movetime = float(movetime)
 
     def gtp_time(self, args):
@@ -47,8 +46,8 @@ class Connect4Interface:
         """
         Clear the board and re-initialize the agent.
         """
-        self.game = ConnectState()
-        self.agent = self.AgentClass(deepcopy(self.game))
+        self.game = BitConnectState()
+        self.agent = self.AgentClass(self.game.copy())
 
     def gtp_winner(self, args):
         """
@@ -123,9 +122,10 @@ class Connect4Interface:
         Optional. Return [False, board_str] for debugging.
         """
         board_str = ""
+        board = self.game.board
         for row in range(GameMeta.ROWS):
             for col in range(GameMeta.COLS):
-                val = self.game.board[row][col]
+                val = board[row][col]
                 if val == GameMeta.PLAYERS['one']:
                     board_str += "b"
                 elif val == GameMeta.PLAYERS['two']:
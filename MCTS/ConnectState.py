@@ -1,7 +1,10 @@
-from copy import deepcopy
 import numpy as np
 from meta import GameMeta
 
+ALL_COLUMNS = (1 << GameMeta.COLS) - 1
+# Danh sách cột ứng với mỗi bitmask cột còn đi được (128 trường hợp)
+LEGAL_MOVES = [[col for col in range(GameMeta.COLS) if legal >> col & 1] for legal in range(ALL_COLUMNS + 1)]
+
 
 class ConnectState:
     def __init__(self):
@@ -9,23 +12,44 @@ class ConnectState:
         self.to_play = GameMeta.PLAYERS['one']
         self.height = [GameMeta.ROWS - 1] * GameMeta.COLS
         self.last_played = []
+        # Cập nhật trong move(): cột còn đi được (bit col) và kết quả ván (OUTCOMES)
+        self.legal = ALL_COLUMNS
+        self.outcome = GameMeta.OUTCOMES['none']
 
     def get_board(self):
-        return deepcopy(self.board)
+        return [row[:] for row in self.board]
+
+    def copy(self):
+        """Cheap copy (board rows, height and last move), used instead of deepcopy by the agents."""
+        new = ConnectState.__new__(ConnectState)
+        new.board = [row[:] for row in self.board]
+        new.to_play = self.to_play
+        new.height = self.height[:]
+        new.last_played = self.last_played[:]
+        new.legal = self.legal
+        new.outcome = self.outcome
+        return new
 
     def move(self, col):
-        self.board[self.height[col]][col] = self.to_play
-        self.last_played = [self.height[col], col]
+        row = self.height[col]
+        self.board[row][col] = self.to_play
+        self.last_played = [row, col]
         self.height[col] -= 1
+        if row == 0:
+            self.legal &= ~(1 << col)
+        if self.outcome != GameMeta.OUTCOMES['none']:
+            pass # Ván đã kết thúc: giữ kết quả đầu tiên, nước đi sau không ghi đè được
+        elif self.check_win_from(row, col):
+            self.outcome = self.to_play
+        elif not self.legal:
+            self.outcome = GameMeta.OUTCOMES['draw']
         self.to_play = GameMeta.PLAYERS['two'] if self.to_play == GameMeta.PLAYERS['one'] else GameMeta.PLAYERS['one']
 
     def get_legal_moves(self):
-        return [col for col in range(GameMeta.COLS) if self.board[0][col] == 0]
+        return LEGAL_MOVES[self.legal][:] # Bản sao: roll_out của RAVE sửa trực tiếp danh sách
 
     def check_win(self):
-        if len(self.last_played) > 0 and self.check_win_from(self.last_played[0], self.last_played[1]):
-            return self.board[self.last_played[0]][self.last_played[1]]
-        return 0
+        return self.outcome if self.outcome != GameMeta.OUTCOMES['draw'] else 0
 
     def check_win_from(self, row, col):
         player = self.board[row][col]
@@ -101,29 +125,36 @@ class ConnectState:
         return False
 
     def game_over(self):
-        return self.check_win() or len(self.get_legal_moves()) == 0
+        return self.outcome != GameMeta.OUTCOMES['none']
 
     def get_outcome(self):
-        if len(self.get_legal_moves()) == 0 and self.check_win() == 0:
-            return GameMeta.OUTCOMES['draw']
-
-        return GameMeta.OUTCOMES['one'] if self.check_win() == GameMeta.PLAYERS['one'] else GameMeta.OUTCOMES['two']
+        """Winner, OUTCOMES['draw'], or OUTCOMES['none'] while the game goes on."""
+        return self.outcome
 
     def would_lose(self, col, player):
-        temp_state = deepcopy(self)
-        
-        temp_state.move(col)
-  
+        # Đặt thử quân lên bàn rồi gỡ ra, không sao chép trạng thái
         opponent = (GameMeta.PLAYERS['two'] if player == GameMeta.PLAYERS['one']
                     else GameMeta.PLAYERS['one'])
-        
-        for opp_move in temp_state.get_legal_moves():
-            test_state = deepcopy(temp_state)
-            test_state.move(opp_move) 
-            if test_state.check_win() == opponent:
-                return True
-        
-        return False
+        if opponent == self.to_play: # Nước trả lời là của `player`: không thể là đối thủ thắng
+            return False
+
+        row = self.height[col]
+        if row < 0: # Cột đầy
+            return False
+        self.board[row][col] = self.to_play
+        try:
+            for opp_move in range(GameMeta.COLS):
+                opp_row = self.height[opp_move] - (1 if opp_move == col else 0)
+                if opp_row < 0:
+                    continue
+                self.board[opp_row][opp_move] = opponent
+                lost = self.check_win_from(opp_row, opp_move)
+                self.board[opp_row][opp_move] = 0
+                if lost:
+                    return True
+            return False
+        finally:
+            self.board[row][col] = 0
 
     def print(self):
         print('=============================')
@@ -0,0 +1,300 @@
+import math
+import random
+import time
+from array import array
+from random import choice
+
+from meta import GameMeta, MCTSMeta
+from BitConnectState import BitConnectState
+from mcts_mark_2 import Connect4MCTSAgent
+from rave_mcts import RaveMctsAgent
+
+
+class ArrayTree:
+    """
+    MCTS tree stored as parallel columns (struct of arrays) instead of Node
+    objects. A node is an index; the children of a node are created together
+    by expand(), so they occupy the contiguous block
+    [first_child, first_child + num_children). Columns are preallocated and
+    doubled when full; `size` is the node count, kept up to date on insert.
+    About 50 bytes per node versus several hundred for a Node with its dicts.
+    """
+
+    ROOT = 0
+    NO_NODE = -1
+
+    def __init__(self, capacity: int = 1 << 16):
+        self.capacity = max(capacity, 1)
+        self.N = array('l', [0]) * self.capacity
+        self.Q = array('d', [0.0]) * self.capacity
+        self.N_RAVE = array('l', [0]) * self.capacity
+        self.Q_RAVE = array('d', [0.0]) * self.capacity
+        self.parent = array('l', [ArrayTree.NO_NODE]) * self.capacity
+        self.first_child = array('l', [ArrayTree.NO_NODE]) * self.capacity
+        self.num_children = array('b', [0]) * self.capacity
+        self.move = array('b', [-1]) * self.capacity
+        self.size = 1 # Nút gốc (chỉ số 0) luôn tồn tại
+
+    def _columns(self):
+        return (self.N, self.Q, self.N_RAVE, self.Q_RAVE, self.parent, self.first_child, self.num_children, self.move)
+
+    def _reserve(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        new_capacity = self.capacity
+        while new_capacity < needed:
+            new_capacity *= 2
+        extra = new_capacity - self.capacity
+        self.N.extend(array('l', [0]) * extra)
+        self.Q.extend(array('d', [0.0]) * extra)
+        self.N_RAVE.extend(array('l', [0]) * extra)
+        self.Q_RAVE.extend(array('d', [0.0]) * extra)
+        self.parent.extend(array('l', [ArrayTree.NO_NODE]) * extra)
+        self.first_child.extend(array('l', [ArrayTree.NO_NODE]) * extra)
+        self.num_children.extend(array('b', [0]) * extra)
+        self.move.extend(array('b', [-1]) * extra)
+        self.capacity = new_capacity
+
+    def clear(self) -> None:
+        """Drops every node except a fresh root (the columns keep their capacity)."""
+        for column, empty in zip(self._columns(), (0, 0.0, 0, 0.0, ArrayTree.NO_NODE, ArrayTree.NO_NODE, 0, -1)):
+            column[ArrayTree.ROOT] = empty
+        self.size = 1
+
+    def add_children(self, parent: int, moves) -> int:
+        """Appends one child per move under `parent`; returns the index of the first one."""
+        first = self.size
+        self._reserve(first + len(moves))
+        for i, move in enumerate(moves):
+            node = first + i
+            self.N[node] = 0
+            self.Q[node] = 0.0
+            self.N_RAVE[node] = 0
+            self.Q_RAVE[node] = 0.0
+            self.parent[node] = parent
+            self.first_child[node] = ArrayTree.NO_NODE
+            self.num_children[node] = 0
+            self.move[node] = move
+        self.first_child[parent] = first
+        self.num_children[parent] = len(moves)
+        self.size = first + len(moves)
+        return first
+
+    def children(self, node: int) -> range:
+        first = self.first_child[node]
+        return range(first, first + self.num_children[node]) if first != ArrayTree.NO_NODE else range(0)
+
+    def child_by_move(self, node: int, move: int) -> int:
+        for child in self.children(node):
+            if self.move[child] == move:
+                return child
+        return ArrayTree.NO_NODE
+
+    def reroot(self, new_root: int) -> None:
+        """
+        Keeps only the subtree under `new_root` (which becomes node 0),
+        compacting the columns breadth-first so sibling blocks stay contiguous.
+        """
+        old_columns = [column[:self.size] for column in self._columns()]
+        old_first, old_count = old_columns[5], old_columns[6]
+        order = [new_root]
+        new_index = {new_root: 0}
+        for old in order: # BFS: order dài thêm trong lúc duyệt
+            first = old_first[old]
+            for child in range(first, first + old_count[old]) if first != ArrayTree.NO_NODE else ():
+                new_index[child] = len(order)
+                order.append(child)
+        for column, old_column in zip(self._columns(), old_columns):
+            for new, old in enumerate(order):
+                column[new] = old_column[old]
+        for new, old in enumerate(order):
+            self.parent[new] = new_index[old_columns[4][old]] if new else ArrayTree.NO_NODE
+            if self.first_child[new] != ArrayTree.NO_NODE:
+                self.first_child[new] = new_index[old_first[old]]
+        self.move[0] = -1
+        self.size = len(order)
+
+    def nbytes(self) -> int:
+        """Memory used by the columns (allocated capacity, not just `size`)."""
+        return sum(column.itemsize * len(column) for column in self._columns())
+
+
+class ArrayMctsAgent(Connect4MCTSAgent):
+    """
+    Connect4MCTSAgent (or, with rave=True, RaveMctsAgent) on an ArrayTree:
+    same selection, rollout and backup rules, but nodes are indices into
+    preallocated columns and tree_size() is O(1).
+    """
+
+    def __init__(self, state=BitConnectState(), rave: bool = False, capacity: int = 1 << 16):
+        self.root_state = state.copy()
+        self.tree = ArrayTree(capacity)
+        self.rave = rave
+        self.run_time = 0
+        self.node_count = 0
+        self.num_rollouts = 0
+
+    def search(self, time_budget: int, batch_size: int = 1) -> None:
+        start_time = time.time()
+        num_rollouts = 0
+        simulator = self.batch_simulator() if batch_size > 1 else None
+
+        while time.time() - start_time < time_budget:
+            node, state = self.select_node()
+            turn = state.to_play
+            if simulator is not None:
+                self.backup_batch(node, turn, simulator.run(state, batch_size))
+                num_rollouts += batch_size
+                continue
+            if self.rave:
+                outcome, black_cols, white_cols = RaveMctsAgent.roll_out(state)
+                self.backup(node, turn, outcome, black_cols, white_cols)
+            else:
+                outcome = self.roll_out(state)
+                self.backup(node, turn, outcome)
+            num_rollouts += 1
+
+        self.run_time = time.time() - start_time
+        self.node_count = self.tree_size()
+        self.num_rollouts = num_rollouts
+
+    def value(self, node: int, log_parent_N: float, explore: float = MCTSMeta.EXPLORATION,
+              rave_const: float = MCTSMeta.RAVE_CONST) -> float:
+        """Node.value / RaveNode.value for an index; log_parent_N = log(N of the parent)."""
+        tree = self.tree
+        n = tree.N[node]
+        if n == 0:
+            return 0 if explore == 0 else GameMeta.INF
+        uct = tree.Q[node] / n + explore * math.sqrt(2 * log_parent_N / n)
+        if not self.rave:
+            return uct
+        alpha = max(0, (rave_const - n) / rave_const)
+        n_rave = tree.N_RAVE[node]
+        amaf = tree.Q_RAVE[node] / n_rave if n_rave != 0 else 0
+        return (1 - alpha) * uct + alpha * amaf
+
+    def select_node(self) -> tuple:
+        tree = self.tree
+        node = ArrayTree.ROOT
+        state = self.root_state.copy()
+
+        while tree.num_children[node] != 0:
+            log_parent_N = math.log(tree.N[node]) if tree.N[node] > 0 else 0.0
+            best_value, best_nodes = None, []
+            for child in tree.children(node):
+                v = self.value(child, log_parent_N)
+                if best_value is None or v > best_value:
+                    best_value, best_nodes = v, [child]
+                elif v == best_value:
+                    best_nodes.append(child)
+            node = choice(best_nodes)
+            state.move(tree.move[node])
+
+            if tree.N[node] == 0:
+                return node, state
+
+        if self.expand(node, state):
+            node = choice(tree.children(node))
+            state.move(tree.move[node])
+        return node, state
+
+    def expand(self, parent: int, state) -> bool:
+        if state.game_over():
+            return False
+        self.tree.add_children(parent, state.get_legal_moves())
+        return True
+
+    def backup(self, node: int, turn: int, outcome: int, black_cols: list = None, white_cols: list = None) -> None:
+        """Connect4MCTSAgent.backup, plus RaveMctsAgent's AMAF updates when the rollout columns are given."""
+        tree = self.tree
+        rave = black_cols is not None
+        if rave:
+            reward = 0 if outcome == turn else 1
+        else:
+            reward = 1 if outcome == turn else 0
+        while node != ArrayTree.NO_NODE:
+            if rave:
+                for col in (black_cols if turn == GameMeta.PLAYERS['one'] else white_cols):
+                    child = tree.child_by_move(node, col)
+                    if child != ArrayTree.NO_NODE:
+                        tree.Q_RAVE[child] += 1 - reward
+                        tree.N_RAVE[child] += 1
+                turn = 3 - turn
+            tree.N[node] += 1
+            tree.Q[node] += reward
+            node = tree.parent[node]
+            if outcome == GameMeta.OUTCOMES['draw']:
+                reward = 0
+            else:
+                reward = 1 - reward
+
+    def backup_batch(self, node: int, turn: int, playouts) -> None:
+        """Connect4MCTSAgent.backup_batch / RaveMctsAgent.backup_batch on the arrays."""
+        tree = self.tree
+        outcomes = range(len(playouts.outcomes))
+        if self.rave:
+            reward = [0 if outcome == turn else 1 for outcome in outcomes]
+        else:
+            reward = [1 if outcome == turn else 0 for outcome in outcomes]
+        n = playouts.n
+        while node != ArrayTree.NO_NODE:
+            if self.rave:
+                cols = playouts.cols[:, 3 - turn]
+                rave_n = cols.sum(axis=0)
+                rave_q = [1 - r for r in reward] @ cols
+                for child in tree.children(node):
+                    col = tree.move[child]
+                    if rave_n[col]:
+                        tree.Q_RAVE[child] += rave_q[col]
+                        tree.N_RAVE[child] += int(rave_n[col])
+                turn = 3 - turn
+            tree.N[node] += n
+            tree.Q[node] += playouts.outcomes @ reward
+            node = tree.parent[node]
+            reward = [0 if outcome == GameMeta.OUTCOMES['draw'] else 1 - r for outcome, r in zip(outcomes, reward)]
+
+    def best_move(self) -> int:
+        if self.root_state.game_over():
+            return -1
+
+        tree = self.tree
+        children = tree.children(ArrayTree.ROOT)
+        max_value = max(tree.N[c] for c in children)
+        return tree.move[choice([c for c in children if tree.N[c] == max_value])]
+
+    def move(self, move: int) -> None:
+        child = self.tree.child_by_move(ArrayTree.ROOT, move)
+        self.root_state.move(move)
+        if child != ArrayTree.NO_NODE:
+            self.tree.reroot(child)
+        else:
+            self.tree.clear()
+
+    def set_ConnectState(self, state) -> None:
+        self.root_state = state.copy()
+        self.tree.clear()
+
+    set_gamestate = set_ConnectState
+
+    def tree_size(self) -> int:
+        return self.tree.size
+
+
+if __name__ == "__main__":
+    # So sánh số rollout, số nút và bộ nhớ với Connect4MCTSAgent: python array_tree.py [giây]
+    import sys
+    import tracemalloc
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    for name, make in (("Connect4MCTSAgent", lambda: Connect4MCTSAgent(BitConnectState())),
+                       ("ArrayMctsAgent", lambda: ArrayMctsAgent(BitConnectState()))):
+        random.seed(0)
+        tracemalloc.start()
+        agent = make()
+        agent.search(seconds)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        rollouts, nodes, run_time = agent.statistics()
+        if isinstance(agent, ArrayMctsAgent): # Không tính phần dung lượng đã cấp trước nhưng chưa dùng
+            memory = agent.tree.nbytes() * nodes / agent.tree.capacity
+        print(f"{name}: {rollouts} rollouts, {nodes} nodes, {memory / max(nodes, 1):.0f} bytes/node, "
+              f"best move {agent.best_move()}")
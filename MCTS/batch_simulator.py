@@ -0,0 +1,129 @@
+import os
+import sys
+
+import numpy as np
+
+from meta import GameMeta
+
+# Dùng lại kernel bitboard NumPy của minimax_solv (cùng bố cục bit với BitConnectState)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'minimax_solv'))
+import bitboard_batch as bb
+
+
+class Playouts:
+    """
+    Aggregated result of the playouts run from one leaf.
+
+    Attributes:
+        outcomes: counts indexed by GameMeta.OUTCOMES (outcomes[3] = draws)
+        cols: cols[outcome, player, col] = stones `player` dropped in `col`
+            during the playouts that ended with `outcome` (the batched form
+            of the black_cols / white_cols lists of RaveMctsAgent.roll_out)
+    """
+
+    def __init__(self, outcomes: np.ndarray, cols: np.ndarray):
+        self.outcomes = outcomes
+        self.cols = cols
+
+    @property
+    def n(self) -> int:
+        return int(self.outcomes.sum())
+
+    def wins(self, player: int) -> int:
+        return int(self.outcomes[player])
+
+    @property
+    def draws(self) -> int:
+        return int(self.outcomes[GameMeta.OUTCOMES['draw']])
+
+
+class BatchSimulator:
+    """
+    Runs many random playouts at once on NumPy bitboard arrays instead of one
+    BitConnectState at a time: every ply of every unfinished game is a handful
+    of vectorised operations, so the interpreter cost is paid per ply of the
+    batch, not per stone.
+
+    Playouts are uniformly random like Connect4MCTSAgent.roll_out, or drawn
+    in proportion to `column_weights` (for example a centre bias) when given.
+    """
+
+    def __init__(self, playouts_per_leaf: int = 64, column_weights=None, seed=None):
+        self.playouts_per_leaf = playouts_per_leaf
+        self.rng = np.random.default_rng(seed)
+        self.log_weights = None
+        if column_weights is not None:
+            weights = np.asarray(column_weights, dtype=np.float64)
+            if weights.shape != (GameMeta.COLS,) or (weights <= 0).any():
+                raise ValueError(f"column_weights must be {GameMeta.COLS} positive numbers")
+            self.log_weights = np.log(weights)
+
+    def run(self, state, k: int = None) -> Playouts:
+        """`k` playouts (default playouts_per_leaf) from one state."""
+        return self.run_many([state], k)[0]
+
+    def run_many(self, states: list, k: int = None) -> list:
+        """`k` playouts from each state, all simulated as one batch; one Playouts per state."""
+        k = self.playouts_per_leaf if k is None else k
+        leaves = len(states)
+        leaf = np.repeat(np.arange(leaves), k)
+        n = leaves * k
+
+        # Position của minimax_solv lưu quân của người sắp đi: cur = bits[to_play]
+        cur = np.repeat(np.array([s.bits[s.to_play] for s in states], dtype=np.uint64), k)
+        mask = np.repeat(np.array([s.mask for s in states], dtype=np.uint64), k)
+        to_play = np.repeat(np.array([s.to_play for s in states], dtype=np.int8), k)
+        outcome = np.zeros(n, dtype=np.int8)
+        for i, s in enumerate(states):
+            if s.game_over():
+                outcome[i * k:(i + 1) * k] = s.get_outcome()
+        played = np.zeros((n, 3, GameMeta.COLS), dtype=np.int16)
+
+        active = np.flatnonzero(outcome == 0)
+        while active.size:
+            m = mask[active]
+            legal = bb.legal_columns(m)
+            keys = self.rng.random((active.size, GameMeta.COLS))
+            if self.log_weights is not None: # Gumbel-max: cột được chọn với xác suất tỉ lệ với trọng số
+                keys = self.log_weights - np.log(-np.log(keys))
+            cols = np.argmax(np.where(legal, keys, -np.inf), axis=1)
+            c = cur[active]
+            player = to_play[active]
+            won = bb.is_winning_move(c, m, cols)
+            c, m = bb.play_col(c, m, cols)
+            played[active, player, cols] += 1
+
+            outcome[active[won]] = player[won]
+            draw = ~won & (m == bb.BOARD_MASK)
+            outcome[active[draw]] = GameMeta.OUTCOMES['draw']
+            cur[active], mask[active] = c, m
+            to_play[active] = 3 - player
+            active = active[outcome[active] == 0]
+
+        outcomes = np.zeros((leaves, 4), dtype=np.int64)
+        np.add.at(outcomes, (leaf, outcome), 1)
+        cols = np.zeros((leaves, 4, 3, GameMeta.COLS), dtype=np.int64)
+        np.add.at(cols, (leaf, outcome), played)
+        return [Playouts(outcomes[i], cols[i]) for i in range(leaves)]
+
+
+if __name__ == "__main__":
+    # So sánh phân bố kết quả và tốc độ với roll_out tuần tự: python batch_simulator.py [số ván]
+    import random
+    import time
+    from BitConnectState import BitConnectState
+    from mcts_mark_2 import Connect4MCTSAgent
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    random.seed(0)
+    t0 = time.perf_counter()
+    sequential = [0] * 4
+    for _ in range(n):
+        sequential[Connect4MCTSAgent.roll_out(BitConnectState())] += 1
+    sequential_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = BatchSimulator(seed=0).run(BitConnectState(), n)
+    batch_s = time.perf_counter() - t0
+    print(f"{n} playouts: roll_out {sequential_s:.2f} s {sequential[1:]}, "
+          f"batch {batch_s:.2f} s {result.outcomes[1:].tolist()} ({sequential_s / max(batch_s, 1e-9):.0f}x)")
@@ -0,0 +1,84 @@
+import os
+import sys
+
+from meta import GameMeta, MCTSMeta
+
+# Solver chính xác của minimax_solv (cùng bố cục bitboard với BitConnectState)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'minimax_solv'))
+from position import Position
+from solver import Solver, SearchAborted
+from transposition_table import TranspositionTable
+
+
+class EndgameSolver:
+    """
+    Exact solving of MCTS leaves with the minimax_solv Solver. Positions with
+    at least `min_moves` stones are solved (weakly: win / draw / loss) within
+    `max_nodes` negamax nodes; when the budget runs out the leaf is left to the
+    usual rollout. The Solver and its transposition table are kept between
+    calls, so later solves reuse earlier work.
+    """
+
+    def __init__(self, min_moves: int = MCTSMeta.SOLVER_MIN_MOVES, max_nodes: int = MCTSMeta.SOLVER_MAX_NODES,
+                 log_size: int = MCTSMeta.SOLVER_TT_LOG_SIZE):
+        self.min_moves = min_moves
+        self.max_nodes = max_nodes
+        self.solver = Solver(trans_table=TranspositionTable(log_size=log_size))
+        self.calls = 0
+        self.solved = 0
+
+    def solve(self, state) -> int:
+        """
+        Proven outcome of a non-terminal BitConnectState (winner or OUTCOMES['draw']),
+        or OUTCOMES['none'] if it has too few stones or the node budget ran out.
+        """
+        p = Position.from_bitboards(state.bits[state.to_play], state.mask)
+        if p.nb_moves() < self.min_moves:
+            return GameMeta.OUTCOMES['none']
+        self.calls += 1
+        self.solver.set_budget(max_nodes=self.max_nodes)
+        try:
+            score = self.solver.solve(p, weak=True)
+        except SearchAborted:
+            return GameMeta.OUTCOMES['none']
+        self.solved += 1
+        if score > 0:
+            return state.to_play
+        return 3 - state.to_play if score < 0 else GameMeta.OUTCOMES['draw']
+
+    def statistics(self) -> tuple:
+        """(solve attempts, positions solved within the budget, negamax nodes)."""
+        return self.calls, self.solved, self.solver.get_node_count()
+
+if __name__ == "__main__":
+    # Kiểm tra: chơi hết các ván từ thế cờ ngẫu nhiên 21 nước với solver bật. Sau move() gốc mới
+    # có thể là một lá do solver chứng minh (chưa có con): search()/best_move() phải mở lại nó.
+    # python endgame.py [số ván]
+    import random
+    from BitConnectState import BitConnectState
+    from mcts_mark_2 import Connect4MCTSAgent
+    from rave_mcts import RaveMctsAgent
+
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    reopened = 0
+    for game in range(games):
+        rng = random.Random(game)
+        state = BitConnectState()
+        while state.mask.bit_count() < 21 or state.game_over():
+            if state.game_over():
+                state = BitConnectState()
+            state.move(rng.choice(state.get_legal_moves()))
+        agent = (Connect4MCTSAgent, RaveMctsAgent)[game % 2](state)
+        agent.use_solver(min_moves=21)
+        while not state.game_over():
+            proven_leaf = agent.root.outcome != GameMeta.OUTCOMES['none'] and not agent.root.children
+            agent.search(0.05)
+            move = agent.best_move()
+            assert move in state.get_legal_moves(), (game, move)
+            if proven_leaf:
+                reopened += 1
+                if agent.root.outcome == state.to_play: # Thắng đã chứng minh: phải chọn nước thắng
+                    assert agent.root.children[move].outcome == state.to_play, (game, move)
+            state.move(move)
+            agent.move(move)
+    print(f"{games} games OK, {reopened} re-rooted onto solver-proven leaves")
@@ -1,11 +1,11 @@
-from ConnectState import ConnectState
+from BitConnectState import BitConnectState
 from mcts import MCTS
 from mcts_mark_2 import Connect4MCTSAgent
 from rave_mcts import *
 
 
 def play():
-    state = ConnectState()
+    state = BitConnectState()
     mcts = Connect4MCTSAgent(state)
     rave_mcts = RaveMctsAgent(state)
     deci_rave_mcts = DecisiveMoveMctsAgent(state)
@@ -48,7 +48,7 @@ def play():
 def play_match(agent1, agent2, num_games=1):
     wins = {1: 0, 2: 0, 'draw': 0}
     for _ in range(num_games):
-        state = ConnectState()
+        state = BitConnectState()
         agents = {GameMeta.PLAYERS['one']: agent1, GameMeta.PLAYERS['two']: agent2}
         turn = GameMeta.PLAYERS['one']
         while not state.game_over():
@@ -67,7 +67,7 @@ def play_match(agent1, agent2, num_games=1):
             wins['draw'] += 1
     return wins
 
-mcts = Connect4MCTSAgent(ConnectState())
-rave_mcts = RaveMctsAgent(ConnectState())
+mcts = Connect4MCTSAgent(BitConnectState())
+rave_mcts = RaveMctsAgent(BitConnectState())
 results = play_match(mcts, rave_mcts)
 print(f"Base MCTS vs RAVE MCTS: {results}")
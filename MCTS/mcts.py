@@ -1,9 +1,8 @@
 import random
 import time
 import math
-from copy import deepcopy
 
-from ConnectState import ConnectState
+from BitConnectState import BitConnectState
 from meta import GameMeta, MCTSMeta
 
 
@@ -28,8 +27,8 @@ class Node:
 
 
 class MCTS:
-    def __init__(self, state=ConnectState()):
-        self.root_state = deepcopy(state)
+    def __init__(self, state=BitConnectState()):
+        self.root_state = state.copy()
         self.root = Node(None, None)
         self.run_time = 0
         self.node_count = 0
@@ -37,7 +36,7 @@ class MCTS:
 
     def select_node(self) -> tuple:
         node = self.root
-        state = deepcopy(self.root_state)
+        state = self.root_state.copy()
 
         while len(node.children) != 0:
             children = node.children.values()
@@ -56,7 +55,7 @@ class MCTS:
 
         return node, state
 
-    def expand(self, parent: Node, state: ConnectState) -> bool:
+    def expand(self, parent: Node, state: BitConnectState) -> bool:
         if state.game_over():
             return False
 
@@ -65,7 +64,7 @@ class MCTS:
 
         return True
 
-    def roll_out(self, state: ConnectState) -> int:
+    def roll_out(self, state: BitConnectState) -> int:
         while not state.game_over():
             state.move(random.choice(state.get_legal_moves()))
 
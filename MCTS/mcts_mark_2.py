@@ -1,11 +1,10 @@
 import random
 import time
 import math
-from copy import deepcopy
 from queue import Queue
 from random import choice
 from meta import GameMeta, MCTSMeta
-from ConnectState import ConnectState
+from BitConnectState import BitConnectState
 
 
 class Node:
@@ -21,8 +20,8 @@ class Node:
         Q_RAVE (int): times this move has been critical in a rollout
         N_RAVE (int): times this move has appeared in a rollout
         children (dict): dictionary of successive nodes
-        outcome (int): If node is a leaf, then outcome indicates
-                       the winner, else None
+        outcome (int): proven result of the position (MCTS-Solver): the winner,
+                       OUTCOMES['draw'], or none while it is not proven
     """
 
     def __init__(self, move: tuple = None, parent: object = None):
@@ -66,33 +65,57 @@ class Connect4MCTSAgent:
     """
     MCTS for Connect Four
     Attributes:
-        root_state (ConnectState): Game simulator that helps us to understand the game situation
+        root_state (BitConnectState): Game simulator that helps us to understand the game situation
         root (Node): Root of the tree search
         run_time (int): time per each run
         node_count (int): the whole nodes in tree
         num_rollouts (int): The number of rollouts for each search
+        endgame (EndgameSolver): exact solver for late leaves, None unless use_solver() was called
         EXPLORATION (int): specifies how much the value should favor
                            nodes that have yet to be thoroughly explored versus nodes
                            that seem to have a high win rate.
     """
 
-    def __init__(self, state=ConnectState()):
-        self.root_state = deepcopy(state)
+    def __init__(self, state=BitConnectState()):
+        self.root_state = state.copy()
         self.root = Node()
         self.run_time = 0
         self.node_count = 0
         self.num_rollouts = 0
 
-    def search(self, time_budget: int) -> None:
+    endgame = None
+
+    def use_solver(self, min_moves: int = MCTSMeta.SOLVER_MIN_MOVES, max_nodes: int = MCTSMeta.SOLVER_MAX_NODES) -> None:
+        """
+        Hybrid search: leaves with at least `min_moves` stones are solved exactly
+        by the minimax_solv Solver (within `max_nodes` nodes) instead of rolled out.
+        """
+        from endgame import EndgameSolver
+        self.endgame = EndgameSolver(min_moves, max_nodes)
+
+    def search(self, time_budget: int, batch_size: int = 1) -> None:
         """
         Search and update the search tree for a specified amount of time in seconds.
+        With batch_size > 1 the search is leaf-parallel: each selected leaf gets
+        batch_size random playouts run together by a BatchSimulator (NumPy).
         """
         start_time = time.time()
         num_rollouts = 0
+        simulator = self.batch_simulator() if batch_size > 1 else None
+        self.reopen_root()
 
-        # do until we exceed our time budget
-        while time.time() - start_time < time_budget:
+        # do until we exceed our time budget or the root is proven
+        while time.time() - start_time < time_budget and self.root.outcome == GameMeta.OUTCOMES['none']:
             node, state = self.select_node()
+            if self.prove_leaf(node, state):
+                # the exact result replaces the rollout
+                self.backup(node, state.to_play, node.outcome)
+                num_rollouts += 1
+                continue
+            if simulator is not None:
+                self.backup_batch(node, state.to_play, simulator.run(state, batch_size))
+                num_rollouts += batch_size
+                continue
             outcome = self.roll_out(state)
             self.backup(node, state.to_play, outcome)
             num_rollouts += 1
@@ -107,14 +130,14 @@ class Connect4MCTSAgent:
         Select a node in the tree to perform a single simulation from.
         """
         node = self.root
-        state = deepcopy(self.root_state)
+        state = self.root_state.copy()
 
         # stop if we find reach a leaf node
         while len(node.children) != 0:
-            # descend to the maximum value node, break ties at random
-            children = node.children.values()
+            # descend to the maximum value node, break ties at random; proven subtrees are skipped
+            children = self.unproven_children(node)
             max_value = max(children, key=lambda n: n.value).value
-            max_nodes = [n for n in node.children.values()
+            max_nodes = [n for n in children
                          if n.value == max_value]
             node = choice(max_nodes)
             state.move(node.move)
@@ -130,7 +153,7 @@ class Connect4MCTSAgent:
         return node, state
 
     @staticmethod
-    def expand(parent: Node, state: ConnectState) -> bool:
+    def expand(parent: Node, state: BitConnectState) -> bool:
         """
         Generate the children of the passed "parent" node based on the available
         moves in the passed game state and add them to the tree.
@@ -147,7 +170,7 @@ class Connect4MCTSAgent:
         return True
 
     @staticmethod
-    def roll_out(state: ConnectState) -> int:
+    def roll_out(state: BitConnectState) -> int:
         """
         Simulate an entirely random game from the passed state and return the winning player.
 
@@ -184,18 +207,105 @@ class Connect4MCTSAgent:
             else:
                 reward = 1 - reward
 
+    @staticmethod
+    def backup_batch(node: Node, turn: int, playouts) -> None:
+        """
+        backup() for a whole batch of playouts from the same leaf: the reward is
+        a vector over the outcomes, weighted by how many playouts ended with each.
+        """
+        outcomes = range(len(playouts.outcomes))
+        reward = [1 if outcome == turn else 0 for outcome in outcomes]
+        n = playouts.n
+
+        while node is not None:
+            node.N += n
+            node.Q += int(playouts.outcomes @ reward)
+            node = node.parent
+            reward = [0 if outcome == GameMeta.OUTCOMES['draw'] else 1 - r for outcome, r in zip(outcomes, reward)]
+
+    @staticmethod
+    def unproven_children(node: Node) -> list:
+        """Children still worth searching (all of them if every child is proven)."""
+        children = [n for n in node.children.values() if n.outcome == GameMeta.OUTCOMES['none']]
+        return children or list(node.children.values())
+
+    def prove_leaf(self, node: Node, state: BitConnectState) -> bool:
+        """
+        MCTS-Solver: a game-over node, or one the endgame solver can solve, is
+        proven and the result is propagated to the ancestors. Returns True if
+        the node is proven.
+        """
+        if node.outcome == GameMeta.OUTCOMES['none']:
+            if state.game_over():
+                node.outcome = state.get_outcome()
+            elif self.endgame is not None:
+                node.outcome = self.endgame.solve(state)
+            if node.outcome != GameMeta.OUTCOMES['none']:
+                self.propagate_proven(node, state.to_play)
+        return node.outcome != GameMeta.OUTCOMES['none']
+
+    def reopen_root(self) -> None:
+        """
+        A leaf proven by the endgame solver has no children carrying the proof.
+        Once move() makes it the root, clear its outcome so that search() expands
+        it and proves its moves, and best_move() has a proven move to return.
+        """
+        root = self.root
+        if root.outcome == GameMeta.OUTCOMES['none'] or self.root_state.game_over():
+            return
+        outcomes = [child.outcome for child in root.children.values()]
+        if self.root_state.to_play in outcomes or (outcomes and all(outcomes)):
+            return
+        root.outcome = GameMeta.OUTCOMES['none']
+
+    @staticmethod
+    def propagate_proven(node: Node, to_play: int) -> None:
+        """
+        Walk up from a newly proven node (to_play: player to move there). A
+        parent is a proven win if one child is a win for the player to move at
+        the parent, otherwise it is proven only once all its children are: a
+        draw if one of them is a draw, else a loss.
+        """
+        node, to_play = node.parent, 3 - to_play
+        while node is not None:
+            outcomes = [child.outcome for child in node.children.values()]
+            if to_play in outcomes:
+                node.outcome = to_play
+            elif all(outcomes):
+                node.outcome = GameMeta.OUTCOMES['draw'] if GameMeta.OUTCOMES['draw'] in outcomes else 3 - to_play
+            else:
+                return
+            node, to_play = node.parent, 3 - to_play
+
+    def batch_simulator(self):
+        """BatchSimulator for the leaf-parallel search, created on first use (needs NumPy)."""
+        if getattr(self, 'simulator', None) is None:
+            from batch_simulator import BatchSimulator
+            self.simulator = BatchSimulator()
+        return self.simulator
+
     def best_move(self) -> tuple:
         """
         Return the best move according to the current tree.
         Returns:
-            best move in terms of the most simulations number unless the game is over
+            a proven win if there is one, otherwise the most simulated move that is not
+            a proven loss, unless the game is over
         """
         if self.root_state.game_over():
             return -1
+        if not self.root.children: # no search yet from this root (e.g. a solver-proven leaf)
+            self.expand(self.root, self.root_state.copy())
+
+        to_play = self.root_state.to_play
+        children = list(self.root.children.values())
+        wins = [n for n in children if n.outcome == to_play]
+        if wins:
+            return choice(wins).move
+        children = [n for n in children if n.outcome != 3 - to_play] or children
 
         # choose the move of the most simulated node breaking ties randomly
-        max_value = max(self.root.children.values(), key=lambda n: n.N).N
-        max_nodes = [n for n in self.root.children.values() if n.N == max_value]
+        max_value = max(children, key=lambda n: n.N).N
+        max_nodes = [n for n in children if n.N == max_value]
         bestchild = choice(max_nodes)
         return bestchild.move
 
@@ -214,11 +324,11 @@ class Connect4MCTSAgent:
         self.root_state.move(move)
         self.root = Node()
 
-    def set_ConnectState(self, state: ConnectState) -> None:
+    def set_ConnectState(self, state: BitConnectState) -> None:
         """
-        Set the root_state of the tree to the passed ConnectState, this clears all the information stored in the tree since none of it applies to the new state.
+        Set the root_state of the tree to the passed state, this clears all the information stored in the tree since none of it applies to the new state.
         """
-        self.root_state = deepcopy(state)
+        self.root_state = state.copy()
         self.root = Node()
 
     def statistics(self) -> tuple:
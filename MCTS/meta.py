@@ -19,3 +19,7 @@ class MCTSMeta:
     K_CONST = 10
     A_CONST = 0.25
     WARMUP_ROLLOUTS = 7
+    VIRTUAL_LOSS = 1
+    SOLVER_MIN_MOVES = 22 # Số quân tối thiểu trên bàn để giải chính xác một lá (endgame.py)
+    SOLVER_MAX_NODES = 20000
+    SOLVER_TT_LOG_SIZE = 20
@@ -0,0 +1,222 @@
+import os
+import random
+import time
+from collections import deque
+from multiprocessing import Pool
+from random import choice
+
+from meta import GameMeta, MCTSMeta
+from BitConnectState import BitConnectState
+from mcts_mark_2 import Connect4MCTSAgent, Node
+
+
+def root_statistics(agent) -> dict:
+    """{move: [N, Q, N_RAVE, Q_RAVE]} of the root children of a Node-based agent or an ArrayMctsAgent."""
+    if hasattr(agent, 'tree'): # ArrayMctsAgent
+        tree = agent.tree
+        return {tree.move[c]: [tree.N[c], tree.Q[c], tree.N_RAVE[c], tree.Q_RAVE[c]]
+                for c in tree.children(tree.ROOT)}
+    return {move: [child.N, child.Q, getattr(child, 'N_RAVE', 0), getattr(child, 'Q_RAVE', 0)]
+            for move, child in agent.root.children.items()}
+
+
+def _search_worker(job: tuple) -> tuple:
+    """Runs in a worker process: one independent search, returns (root statistics, rollouts, nodes)."""
+    agent_class, agent_kwargs, state, time_budget, batch_size, seed = job
+    random.seed(seed)
+    agent = agent_class(state, **agent_kwargs)
+    if batch_size > 1:
+        from batch_simulator import BatchSimulator
+        agent.simulator = BatchSimulator(seed=seed)
+        agent.search(time_budget, batch_size)
+    else:
+        agent.search(time_budget)
+    return root_statistics(agent), agent.num_rollouts, agent.node_count
+
+
+class RootParallelAgent:
+    """
+    Root parallelisation: `workers` processes each grow an independent tree of
+    `agent_class` from the same root_state (different seeds) for the whole time
+    budget, then the root children statistics are summed and best_move picks
+    the most visited move of the merged root. Same interface as the agents, so
+    it can be given to Connect4Interface, e.g.
+    functools.partial(RootParallelAgent, agent_class=RaveMctsAgent, workers=4).
+
+    The trees live in the worker processes and are dropped after each search
+    (no subtree reuse between moves).
+    """
+
+    def __init__(self, state=BitConnectState(), agent_class=Connect4MCTSAgent, workers: int = None,
+                 batch_size: int = 1, seed: int = None, **agent_kwargs):
+        self.root_state = state.copy()
+        self.agent_class = agent_class
+        self.agent_kwargs = agent_kwargs
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.seed = seed if seed is not None else random.randrange(1 << 30)
+        self.root_stats = {}
+        self.worker_stats = []
+        self.pool = None
+        self.run_time = 0
+        self.node_count = 0
+        self.num_rollouts = 0
+
+    def search(self, time_budget: int) -> None:
+        start_time = time.time()
+        if self.pool is None:
+            self.pool = Pool(self.workers)
+        jobs = [(self.agent_class, self.agent_kwargs, self.root_state, time_budget, self.batch_size, self.seed + i)
+                for i in range(self.workers)]
+        self.seed += self.workers # Lần search sau dùng seed khác
+        results = self.pool.map(_search_worker, jobs)
+
+        merged = {}
+        for stats, _, _ in results:
+            for move, values in stats.items():
+                total = merged.setdefault(move, [0, 0, 0, 0])
+                for i, v in enumerate(values):
+                    total[i] += v
+        self.root_stats = merged
+        self.worker_stats = [(rollouts, nodes) for _, rollouts, nodes in results]
+        self.run_time = time.time() - start_time
+        self.num_rollouts = sum(rollouts for rollouts, _ in self.worker_stats)
+        self.node_count = sum(nodes for _, nodes in self.worker_stats)
+
+    def best_move(self) -> int:
+        if self.root_state.game_over():
+            return -1
+
+        max_value = max(values[0] for values in self.root_stats.values())
+        return choice([move for move, values in self.root_stats.items() if values[0] == max_value])
+
+    def move(self, move: int) -> None:
+        self.root_state.move(move)
+        self.root_stats = {}
+
+    def set_ConnectState(self, state) -> None:
+        self.root_state = state.copy()
+        self.root_stats = {}
+
+    set_gamestate = set_ConnectState
+
+    def statistics(self, per_worker: bool = False) -> tuple:
+        """
+        (num_rollouts, node_count, run_time) summed over the workers; with
+        per_worker=True a fourth item lists (rollouts, nodes) of each worker.
+        """
+        if per_worker:
+            return self.num_rollouts, self.node_count, self.run_time, list(self.worker_stats)
+        return self.num_rollouts, self.node_count, self.run_time
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+def _seed_rollout_worker(seed: int) -> None:
+    random.seed(seed + os.getpid())
+
+
+def _rollout_worker(states: list) -> list:
+    """Runs in a worker process: one random playout per state, returns the outcomes."""
+    return [Connect4MCTSAgent.roll_out(state) for state in states]
+
+
+class TreeParallelAgent(Connect4MCTSAgent):
+    """
+    Tree parallelisation of Connect4MCTSAgent: one shared tree, selected in this
+    process, with the rollouts done by a pool of `workers` processes. Leaves are
+    selected `batch_size` at a time and every node on a selected path gets a
+    virtual loss (N += virtual_loss, Q unchanged) so the next selections spread
+    over other branches; when a batch of rollouts comes back the virtual loss is
+    removed and the real results are backed up. Up to `workers` batches are in
+    flight at once. workers=0 runs the rollouts inline (virtual loss only).
+    """
+
+    def __init__(self, state=BitConnectState(), workers: int = None, batch_size: int = 16,
+                 virtual_loss: int = MCTSMeta.VIRTUAL_LOSS, seed: int = None):
+        super().__init__(state)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.batch_size = batch_size
+        self.virtual_loss = virtual_loss
+        self.seed = seed if seed is not None else random.randrange(1 << 30)
+        self.pool = None
+
+    def search(self, time_budget: int) -> None:
+        start_time = time.time()
+        num_rollouts = 0
+        if self.pool is None and self.workers > 0:
+            self.pool = Pool(self.workers, initializer=_seed_rollout_worker, initargs=(self.seed,))
+        pending = deque()
+        self.reopen_root()
+
+        while time.time() - start_time < time_budget and self.root.outcome == GameMeta.OUTCOMES['none']:
+            leaves = [self.select_leaf() for _ in range(self.batch_size)]
+            states = [state for _, state in leaves]
+            if self.pool is None:
+                self.finish_batch(leaves, _rollout_worker(states))
+            else:
+                pending.append((leaves, self.pool.apply_async(_rollout_worker, (states,))))
+            # Chờ lô cũ nhất khi đã đủ số lô đang chạy, xử lý sớm các lô đã xong
+            while pending and (len(pending) > self.workers or pending[0][1].ready()):
+                leaves, result = pending.popleft()
+                self.finish_batch(leaves, result.get())
+            num_rollouts += self.batch_size
+        while pending:
+            leaves, result = pending.popleft()
+            self.finish_batch(leaves, result.get())
+
+        self.run_time = time.time() - start_time
+        self.node_count = self.tree_size()
+        self.num_rollouts = num_rollouts
+
+    def select_leaf(self) -> tuple:
+        """select_node() followed by a virtual loss on the path to the selected node."""
+        node, state = self.select_node()
+        self.prove_leaf(node, state)
+        self.add_virtual_loss(node, self.virtual_loss)
+        return node, state
+
+    @staticmethod
+    def add_virtual_loss(node: Node, amount: int) -> None:
+        while node is not None:
+            node.N += amount
+            node = node.parent
+
+    def finish_batch(self, leaves: list, outcomes: list) -> None:
+        for (node, state), outcome in zip(leaves, outcomes):
+            self.add_virtual_loss(node, -self.virtual_loss)
+            self.backup(node, state.to_play, node.outcome or outcome) # Kết quả đã chứng minh thay cho rollout
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+if __name__ == "__main__":
+    # So sánh song song gốc và song song cây: python parallel.py [số tiến trình] [giây]
+    import sys
+    from rave_mcts import RaveMctsAgent
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    for agent_class in (Connect4MCTSAgent, RaveMctsAgent):
+        agent = RootParallelAgent(BitConnectState(), agent_class, workers=workers, seed=0)
+        agent.search(seconds)
+        rollouts, nodes, run_time, per_worker = agent.statistics(per_worker=True)
+        print(f"Root-parallel {agent_class.__name__} x{workers}: {rollouts} rollouts, {nodes} nodes in {run_time:.2f} s, "
+              f"per worker {[r for r, _ in per_worker]}, best move {agent.best_move()}")
+        print("  root N:", {move: values[0] for move, values in sorted(agent.root_stats.items())})
+        agent.close()
+
+    agent = TreeParallelAgent(BitConnectState(), workers=workers, seed=0)
+    agent.search(seconds)
+    rollouts, nodes, run_time = agent.statistics()
+    print(f"Tree-parallel Connect4MCTSAgent x{workers}: {rollouts} rollouts, {nodes} nodes in {run_time:.2f} s, "
+          f"best move {agent.best_move()}")
+    print("  root N:", {move: child.N for move, child in sorted(agent.root.children.items())})
+    agent.close()
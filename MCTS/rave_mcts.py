@@ -1,11 +1,10 @@
 import random
 import time
 import math
-from copy import deepcopy
 from queue import Queue
 from random import choice
 from meta import GameMeta, MCTSMeta
-from ConnectState import ConnectState
+from BitConnectState import BitConnectState
 from mcts_mark_2 import Node, Connect4MCTSAgent
 
 class RaveNode(Node):
@@ -36,20 +35,20 @@ class RaveNode(Node):
 
 class RaveMctsAgent(Connect4MCTSAgent):
 
-    def __init__(self, state=ConnectState()):
-        self.root_state = deepcopy(state)
+    def __init__(self, state=BitConnectState()):
+        self.root_state = state.copy()
         self.root = RaveNode()
         self.run_time = 0
         self.node_count = 0
         self.num_rollouts = 0
 
-    def set_gamestate(self, state: ConnectState) -> None:
+    def set_gamestate(self, state: BitConnectState) -> None:
         """
         Set the root_state of the tree to the passed gamestate, this clears all
         the information stored in the tree since none of it applies to the new
         state.
         """
-        self.root_state = deepcopy(state)
+        self.root_state = state.copy()
         self.root = RaveNode()
 
     def move(self, move: tuple) -> None:
@@ -66,15 +65,27 @@ class RaveMctsAgent(Connect4MCTSAgent):
         self.root_state.move(move)
         self.root = RaveNode()
 
-    def search(self, time_budget: int) -> None:
+    def search(self, time_budget: int, batch_size: int = 1) -> None:
         """
         Perform MCTS search for a specified amount of time in seconds.
+        batch_size > 1 runs batch_size playouts per leaf with the BatchSimulator
+        (plain random playouts: the roll_out policies of the subclasses are not used).
         """
         start_time = time.time()
         num_rollouts = 0
+        simulator = self.batch_simulator() if batch_size > 1 else None
+        self.reopen_root()
 
-        while time.time() - start_time < time_budget:
+        while time.time() - start_time < time_budget and self.root.outcome == GameMeta.OUTCOMES['none']:
             node, state = self.select_node()
+            if self.prove_leaf(node, state):
+                self.backup(node, state.to_play, node.outcome, [], [])
+                num_rollouts += 1
+                continue
+            if simulator is not None:
+                self.backup_batch(node, state.to_play, simulator.run(state, batch_size))
+                num_rollouts += batch_size
+                continue
             outcome, black_cols, white_cols = self.roll_out(state)  # <-- FIXED
             self.backup(node, state.to_play, outcome, black_cols, white_cols)  # <-- FIXED
             num_rollouts += 1
@@ -88,11 +99,12 @@ class RaveMctsAgent(Connect4MCTSAgent):
         Select a node in the tree to perform a single simulation from.
         """
         node = self.root
-        state = deepcopy(self.root_state)
+        state = self.root_state.copy()
 
         while len(node.children) != 0:
-            max_value = max(node.children.values(), key=lambda n: n.value).value
-            max_nodes = [n for n in node.children.values() if n.value == max_value]
+            children = self.unproven_children(node)
+            max_value = max(children, key=lambda n: n.value).value
+            max_nodes = [n for n in children if n.value == max_value]
             node = choice(max_nodes)
             state.move(node.move)
 
@@ -106,7 +118,7 @@ class RaveMctsAgent(Connect4MCTSAgent):
         return node, state
     
     @staticmethod
-    def expand(parent: RaveNode, state: ConnectState) -> bool:
+    def expand(parent: RaveNode, state: BitConnectState) -> bool:
         """
         Generate children for the given node based on legal moves and add them to the tree.
         """
@@ -121,7 +133,7 @@ class RaveMctsAgent(Connect4MCTSAgent):
         return True
     
     @staticmethod
-    def roll_out(state: ConnectState) -> tuple:
+    def roll_out(state: BitConnectState) -> tuple:
         """
         Simulate a random game except for the critical cells, then return the winner.
         Also returns the critical points for each player.
@@ -168,25 +180,37 @@ class RaveMctsAgent(Connect4MCTSAgent):
             else:
                 reward = 1 - reward
             turn = (GameMeta.PLAYERS['two'] if turn == GameMeta.PLAYERS['one'] else GameMeta.PLAYERS['one'])
-        
-    def best_move(self) -> tuple:
+
+    def backup_batch(self, node: RaveNode, turn: int, playouts) -> None:
         """
-        Return the best move according to the most simulations, breaking ties randomly.
+        backup() for a batch of playouts from the same leaf. roll_out puts a move
+        in black_cols when player one is to play after it (a stone of player two),
+        so the AMAF columns read for `turn` are the stones of player 3 - turn.
         """
-        if self.root_state.game_over():
-            return -1  # Indicate that the game is over
+        outcomes = range(len(playouts.outcomes))
+        reward = [0 if outcome == turn else 1 for outcome in outcomes]
+        n = playouts.n
+
+        while node is not None:
+            cols = playouts.cols[:, 3 - turn] # [outcome, col]
+            rave_n = cols.sum(axis=0)
+            rave_q = [1 - r for r in reward] @ cols
+            for col, child in node.children.items():
+                if rave_n[col]:
+                    child.Q_RAVE += int(rave_q[col])
+                    child.N_RAVE += int(rave_n[col])
+            node.N += n
+            node.Q += int(playouts.outcomes @ reward)
+            node = node.parent
+            reward = [0 if outcome == GameMeta.OUTCOMES['draw'] else 1 - r for outcome, r in zip(outcomes, reward)]
+            turn = 3 - turn
 
-        max_value = max(self.root.children.values(), key=lambda n: n.N).N
-        max_nodes = [n for n in self.root.children.values() if n.N == max_value]
-        bestchild = choice(max_nodes)
-        return bestchild.move
-    
 
 class DecisiveMoveMctsAgent(RaveMctsAgent):
     """
     Decisive Move MCTS Agent for Connect Four. Prioritizes playing critical moves first.
     """
-    def roll_out(self, state: ConnectState) -> tuple:
+    def roll_out(self, state: BitConnectState) -> tuple:
         black_cols = []
         white_cols = []
 
@@ -228,17 +252,17 @@ class LGRMctsAgent(RaveMctsAgent):
     """
     LGR (Last Game Reply) MCTS Agent for Connect Four. Uses previous replies to guide moves.
     """
-    def __init__(self, state: ConnectState = ConnectState()):
+    def __init__(self, state: BitConnectState = BitConnectState()):
         super().__init__(state)
         self.black_reply = {}
         self.white_reply = {}
 
-    def set_gamestate(self, state: ConnectState) -> None:
+    def set_gamestate(self, state: BitConnectState) -> None:
         super().set_gamestate(state)
         self.white_reply = {}
         self.black_reply = {}
 
-    def roll_out(self, state: ConnectState) -> tuple:
+    def roll_out(self, state: BitConnectState) -> tuple:
         black_cols = []
         white_cols = []
 
@@ -306,17 +330,17 @@ class PoolRaveMctsAgent(RaveMctsAgent):
     """
     Pool RAVE MCTS Agent for Connect Four. Uses a pool of high-impact moves for each player.
     """
-    def __init__(self, state: ConnectState = ConnectState()):
+    def __init__(self, state: BitConnectState = BitConnectState()):
         super().__init__(state)
         self.black_rave = {}
         self.white_rave = {}
 
-    def set_gamestate(self, state: ConnectState) -> None:
+    def set_gamestate(self, state: BitConnectState) -> None:
         super().set_gamestate(state)
         self.black_rave = {}
         self.white_rave = {}
 
-    def roll_out(self, state: ConnectState) -> tuple:
+    def roll_out(self, state: BitConnectState) -> tuple:
         black_cols = []
         white_cols = []
 
@@ -0,0 +1,202 @@
+import math
+import time
+from random import choice
+
+from meta import GameMeta, MCTSMeta
+from BitConnectState import BitConnectState, BOTTOM, COLUMN
+from mcts_mark_2 import Connect4MCTSAgent, Node
+from rave_mcts import RaveMctsAgent, RaveNode
+
+
+class TranspositionTable:
+    """
+    Position key (BitConnectState.key()) -> Node. Counts how many child links
+    created by expand() reused an existing node instead of a new one.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.lookups = 0
+        self.merges = 0
+
+    def get_or_create(self, key: int, create):
+        self.lookups += 1
+        node = self.nodes.get(key)
+        if node is not None:
+            self.merges += 1
+            return node
+        node = self.nodes[key] = create()
+        node.key = key
+        return node
+
+    def merge_rate(self) -> float:
+        """Fraction of expanded children that were transpositions of an existing node."""
+        return self.merges / self.lookups if self.lookups else 0.0
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+class TranspositionMctsAgent(Connect4MCTSAgent):
+    """
+    Connect4MCTSAgent (or RaveMctsAgent with rave=True) on a DAG: every position
+    is a single node, found through a TranspositionTable when a parent is
+    expanded, so all the move orders that reach it share its statistics.
+
+    A node can have several parents, so selection records the path it took and
+    backup updates exactly the nodes on that path; the UCT term uses the N of
+    the parent on the path, and moves are the keys of the children dicts
+    (Node.move / Node.parent only describe the first way the node was reached).
+    """
+
+    def __init__(self, state=BitConnectState(), rave: bool = False):
+        self.rave = rave
+        self.node_class = RaveNode if rave else Node
+        self.set_ConnectState(state)
+        self.run_time = 0
+        self.node_count = 0
+        self.num_rollouts = 0
+
+    def search(self, time_budget: int) -> None:
+        start_time = time.time()
+        num_rollouts = 0
+
+        while time.time() - start_time < time_budget:
+            path, state = self.select_node()
+            turn = state.to_play
+            if self.rave:
+                outcome, black_cols, white_cols = RaveMctsAgent.roll_out(state)
+                self.backup(path, turn, outcome, black_cols, white_cols)
+            else:
+                outcome = self.roll_out(state)
+                self.backup(path, turn, outcome)
+            num_rollouts += 1
+
+        self.run_time = time.time() - start_time
+        self.node_count = self.tree_size()
+        self.num_rollouts = num_rollouts
+
+    def value(self, node, parent_N: int, explore: float = MCTSMeta.EXPLORATION,
+              rave_const: float = MCTSMeta.RAVE_CONST) -> float:
+        """Node.value / RaveNode.value with the N of the parent on the current path."""
+        if node.N == 0:
+            return 0 if explore == 0 else GameMeta.INF
+        uct = node.Q / node.N + explore * math.sqrt(2 * math.log(parent_N) / node.N)
+        if not self.rave:
+            return uct
+        alpha = max(0, (rave_const - node.N) / rave_const)
+        amaf = node.Q_RAVE / node.N_RAVE if node.N_RAVE != 0 else 0
+        return (1 - alpha) * uct + alpha * amaf
+
+    def select_node(self) -> tuple:
+        """Returns (path from the root to the selected node, state of that node)."""
+        node = self.root
+        path = [node]
+        state = self.root_state.copy()
+
+        while len(node.children) != 0:
+            values = {move: self.value(child, node.N) for move, child in node.children.items()}
+            max_value = max(values.values())
+            move = choice([move for move, v in values.items() if v == max_value])
+            node = node.children[move]
+            path.append(node)
+            state.move(move)
+
+            if node.N == 0:
+                return path, state
+
+        if self.expand(node, state):
+            move = choice(list(node.children))
+            node = node.children[move]
+            path.append(node)
+            state.move(move)
+        return path, state
+
+    def expand(self, parent, state: BitConnectState) -> bool:
+        if state.game_over():
+            return False
+
+        # Khoá sau nước đi tính thẳng trên bitboard: quân của người đi kế tiếp + mask mới
+        opponent_bits = state.bits[3 - state.to_play]
+        for move in state.get_legal_moves():
+            mask = state.mask | ((state.mask + BOTTOM[move]) & COLUMN[move])
+            parent.children[move] = self.table.get_or_create(
+                opponent_bits + mask, lambda: self.node_class(move, parent))
+        return True
+
+    def backup(self, path: list, turn: int, outcome: int, black_cols: list = None, white_cols: list = None) -> None:
+        """backup() of Connect4MCTSAgent / RaveMctsAgent along the selected path."""
+        rave = black_cols is not None
+        if rave:
+            reward = 0 if outcome == turn else 1
+        else:
+            reward = 1 if outcome == turn else 0
+
+        for node in reversed(path):
+            if rave:
+                for col in (black_cols if turn == GameMeta.PLAYERS['one'] else white_cols):
+                    if col in node.children:
+                        node.children[col].Q_RAVE += (1 - reward)
+                        node.children[col].N_RAVE += 1
+                turn = 3 - turn
+            node.N += 1
+            node.Q += reward
+            if outcome == GameMeta.OUTCOMES['draw']:
+                reward = 0
+            else:
+                reward = 1 - reward
+
+    def best_move(self) -> int:
+        if self.root_state.game_over():
+            return -1
+
+        max_value = max(child.N for child in self.root.children.values())
+        return choice([move for move, child in self.root.children.items() if child.N == max_value])
+
+    def move(self, move: int) -> None:
+        self.root_state.move(move)
+        if move not in self.root.children:
+            self.set_ConnectState(self.root_state)
+            return
+        self.root = self.root.children[move]
+        self.root.parent = None
+        # Bỏ các nút không còn đi tới được từ gốc mới
+        reachable, stack = {self.root.key: self.root}, [self.root]
+        while stack:
+            for child in stack.pop().children.values():
+                if child.key not in reachable:
+                    reachable[child.key] = child
+                    stack.append(child)
+        self.table.nodes = reachable
+
+    def set_ConnectState(self, state) -> None:
+        self.root_state = state.copy()
+        self.table = TranspositionTable()
+        self.root = self.table.get_or_create(self.root_state.key(), self.node_class)
+
+    set_gamestate = set_ConnectState
+
+    def tree_size(self) -> int:
+        """Distinct positions in the graph (O(1): the size of the table)."""
+        return len(self.table)
+
+    def merge_rate(self) -> float:
+        return self.table.merge_rate()
+
+
+if __name__ == "__main__":
+    # So sánh cây thường và đồ thị có bảng chuyển vị: python transposition.py [giây]
+    import random
+    import sys
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    for name, make in (("Connect4MCTSAgent", lambda: Connect4MCTSAgent(BitConnectState())),
+                       ("TranspositionMctsAgent", lambda: TranspositionMctsAgent(BitConnectState())),
+                       ("RaveMctsAgent", lambda: RaveMctsAgent(BitConnectState())),
+                       ("TranspositionMctsAgent(rave)", lambda: TranspositionMctsAgent(BitConnectState(), rave=True))):
+        random.seed(0)
+        agent = make()
+        agent.search(seconds)
+        rollouts, nodes, run_time = agent.statistics()
+        merged = f", merge rate {agent.merge_rate():.1%}" if isinstance(agent, TranspositionMctsAgent) else ""
+        print(f"{name}: {rollouts} rollouts, {nodes} nodes, {rollouts / max(nodes, 1):.2f} rollouts/node{merged}, "
+              f"best move {agent.best_move()}")
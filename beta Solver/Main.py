@@ -1,3 +1,4 @@
+import os
 import sys
 import time
 from Position import Position
@@ -8,6 +9,9 @@ def main():
     weak = False
     analyze = False
     opening_book = "7x6.book"
+    # Ngân sách bộ nhớ cho bảng chuyển vị: -m 512M / -m auto, hoặc biến môi trường TT_MEMORY
+    memory = os.environ.get("TT_MEMORY")
+    workers = int(os.environ.get("TT_WORKERS", "1"))
 
     args = sys.argv[1:]
     i = 0
@@ -22,9 +26,17 @@ def main():
                     opening_book = args[i]
             elif arg[1] == 'a':
                 analyze = True
+            elif arg[1] == 'm':
+                i += 1
+                if i < len(args):
+                    memory = args[i]
+            elif arg[1] == 'j':
+                i += 1
+                if i < len(args):
+                    workers = int(args[i])
         i += 1
 
-    solver = Solver()
+    solver = Solver(memory, workers)
     solver.loadBook(opening_book)
 
     line_number = 1
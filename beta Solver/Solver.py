@@ -1,19 +1,27 @@
 # solver.py
 import copy
+import sys
 from typing import List
 from Position import Position
-from TranspositionTable import TranspositionTable
+from TranspositionTable import TranspositionTable, ENTRY_BYTES, parseMemory, sizeForMemory
 from OpeningBook import OpeningBook
 from MoveSorter import MoveSorter
 
 class Solver:
     INVALID_MOVE = -1000
 
-    def __init__(self):
-        # Chọn TABLE_SIZE = 24, tức bảng có kích thước gần bằng số nguyên tố >= 2^24.
-        TABLE_SIZE = 24
+    def __init__(self, memoryBudget=None, workers: int = 1):
+        # Mặc định TABLE_SIZE = 24, tức bảng có kích thước gần bằng số nguyên tố >= 2^24.
+        # memoryBudget (số byte hoặc chuỗi "512M", "2G", "auto"): chọn TABLE_SIZE lớn nhất vừa
+        # memoryBudget / workers, vì mỗi process có một bảng riêng.
+        TABLE_SIZE, KEY_SIZE = 24, 4
+        if memoryBudget is not None:
+            budget = memoryBudget if isinstance(memoryBudget, int) else parseMemory(memoryBudget)
+            TABLE_SIZE, KEY_SIZE = sizeForMemory(budget, workers)
         # Tạo bảng chuyển vị (transposition table)
-        self.transTable = TranspositionTable(log_size=TABLE_SIZE)
+        self.transTable = TranspositionTable(log_size=TABLE_SIZE, key_size=KEY_SIZE)
+        sys.stderr.write(f"TT capacity: {self.transTable.getSize()} entries (2^{TABLE_SIZE}), "
+                         f"~{self.transTable.getSize() * ENTRY_BYTES >> 20} MB x {workers} workers\n")
         # Khởi tạo opening book với kích thước board từ Position
         self.book = OpeningBook(Position.WIDTH, Position.HEIGHT)
         self.nodeCount = 0
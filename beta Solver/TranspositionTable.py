@@ -1,5 +1,6 @@
 import math
-from typing import Any, List
+import os
+from typing import Any, List, Tuple
 
 def med(min_val: int, max_val: int) -> int:
     return (min_val + max_val) // 2
@@ -66,4 +67,45 @@ class TranspositionTable:
 
     def getSize(self) -> int:
         """Trả về kích thước bảng."""
-        return self.size
\ No newline at end of file
+        return self.size
+
+
+# Mỗi slot: 2 con trỏ list + một int (key đầy đủ); value nhỏ nằm trong cache int của Python
+ENTRY_BYTES = 48
+KEY_BITS = 49  # key = current_position + mask < 2^(WIDTH * (HEIGHT + 1))
+_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def hostMemory() -> int:
+    """Số byte bộ nhớ của container (giới hạn cgroup) hoặc của máy."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                text = f.read().strip()
+        except OSError:
+            continue
+        if text.isdigit() and int(text) < (1 << 60):
+            return int(text)
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def parseMemory(text: str) -> int:
+    """ "512M", "2G", số byte, hoặc "auto" (một nửa bộ nhớ của máy)."""
+    spec = text.strip().upper().rstrip("B").rstrip("I")
+    if spec == "AUTO":
+        return hostMemory() // 2
+    if spec and spec[-1] in _UNITS:
+        return int(float(spec[:-1]) * _UNITS[spec[-1]])
+    return int(spec)
+
+
+def sizeForMemory(budget_bytes: int, workers: int = 1) -> Tuple[int, int]:
+    """
+    Trả về (log_size, key_size) của bảng lớn nhất vừa budget_bytes / workers.
+    key_size: số byte đủ để phân biệt key khi biết key % size (size >= 2^log_size).
+    """
+    per_table = budget_bytes // max(workers, 1)
+    log_size = 10
+    while log_size < 32 and next_prime(1 << (log_size + 1)) * ENTRY_BYTES <= per_table:
+        log_size += 1
+    return log_size, (KEY_BITS - log_size + 7) // 8
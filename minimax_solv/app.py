@@ -8,6 +8,9 @@ import sys
 from pydantic import BaseModel
 from typing import List, Optional
 import math # Thêm import math nếu dùng ceil
+import threading
+import time
+from collections import OrderedDict
 
 try:
     if '.' not in sys.path:
@@ -15,7 +18,12 @@ try:
          if script_dir:
               sys.path.insert(0, script_dir)
     from position import Position
-    from solver import Solver
+    from solver import Solver, SearchAborted
+    from heuristic import HeuristicSearch
+    from shared_table import SharedTranspositionTable
+    from transposition_table import describe_capacity, parse_memory, size_for_memory
+    from metrics import Registry, ply_bucket
+    from request_log import RequestRecorder
 except ImportError as e:
     print(f"CRITICAL ERROR: Could not import AI modules: {e}", file=sys.stderr)
     sys.exit(1)
@@ -27,8 +35,97 @@ except Exception as ex:
     sys.exit(1)
 
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+# --- Khởi động theo giai đoạn ---
+# Server nhận request ngay; Solver (cấp phát TT), snapshot TT và opening book được nạp ở thread nền.
+# /api/test trả về "warming" cho tới khi book nạp xong.
+BOOK_FILE = os.environ.get("BOOK_FILE", f"{Position.WIDTH}x{Position.HEIGHT}.book")
+TT_SNAPSHOT = os.environ.get("TT_SNAPSHOT") # File snapshot TT: khôi phục lúc khởi động, lưu lúc tắt
+WARMUP_WAIT = float(os.environ.get("WARMUP_WAIT", "10")) # Số giây một request chờ Solver sẵn sàng
+# Nhiều worker (gunicorn -w N -k uvicorn.workers.UvicornWorker app:app): SHARED_TT=<tên segment> cho các
+# worker dùng chung một TT trong shared memory; book khi đó được mmap (hoặc đặt BOOK_MMAP=1) để mỗi host
+# chỉ tốn một bản. Segment tồn tại sau khi worker tắt; xoá bằng `python shared_table.py --unlink <tên>`.
+SOLVER_DRIVER = os.environ.get("SOLVER_DRIVER", "bisection") # bisection | mtdf (xem Solver.solve)
+SOLVER_ETC = os.environ.get("SOLVER_ETC", "0") == "1" # Enhanced transposition cutoffs
+SHARED_TT = os.environ.get("SHARED_TT")
+BOOK_MMAP = bool(SHARED_TT) or os.environ.get("BOOK_MMAP", "0") == "1"
+# Bộ nhớ cho TT (byte, "512M", "2G" hoặc "auto"); TT riêng chia đều cho TT_WORKERS worker (mặc định
+# WEB_CONCURRENCY, cũng là số worker gunicorn đọc), TT dùng chung dùng trọn ngân sách
+TT_MEMORY = os.environ.get("TT_MEMORY")
+TT_WORKERS = int(os.environ.get("TT_WORKERS", os.environ.get("WEB_CONCURRENCY", "1")))
+
+solver: Optional[Solver] = None
+solver_ready = threading.Event() # Solver đã tạo xong, có thể phục vụ (book có thể vẫn đang nạp)
+startup = {"status": "warming", "stage": "starting", "started": time.monotonic(), "ready_after_s": None}
+
+def warm_up():
+    """Tạo Solver, khôi phục snapshot TT rồi nạp opening book (chạy ở thread nền)."""
+    global solver
+    t0 = time.monotonic()
+    try:
+        startup["stage"] = "allocating_tt"
+        shared_table = None
+        if SHARED_TT:
+            log_size, key_bits = 24, 32
+            if TT_MEMORY:
+                log_size, key_bits = size_for_memory(parse_memory(TT_MEMORY), TT_WORKERS, shared=True)
+                print(describe_capacity(log_size, key_bits, TT_WORKERS, shared=True), file=sys.stderr)
+            shared_table = SharedTranspositionTable(log_size=log_size, partial_key_bits=key_bits, name=SHARED_TT)
+            print(f"{'Created' if shared_table.created else 'Attached to'} shared TT '{SHARED_TT}'.", file=sys.stderr)
+        new_solver = Solver(trans_table=shared_table, driver=SOLVER_DRIVER, use_etc=SOLVER_ETC,
+                            memory_budget=TT_MEMORY or None, workers=TT_WORKERS)
+        # Với TT dùng chung, chỉ worker tạo segment khôi phục snapshot
+        restore = shared_table is None or shared_table.created
+        if restore and TT_SNAPSHOT and os.path.exists(TT_SNAPSHOT) and new_solver.trans_table:
+            startup["stage"] = "restoring_tt_snapshot"
+            try:
+                restored = new_solver.trans_table.load_snapshot(TT_SNAPSHOT)
+                print(f"Restored {restored} TT entries from snapshot '{TT_SNAPSHOT}'.", file=sys.stderr)
+            except (OSError, EOFError, ValueError) as e:
+                print(f"Warning: Ignoring TT snapshot '{TT_SNAPSHOT}': {e}", file=sys.stderr)
+        solver = new_solver
+        solver_ready.set()
+        print(f"AI Solver ready after {time.monotonic() - t0:.2f}s; loading opening book...", file=sys.stderr)
+
+        startup["stage"] = "loading_book"
+        if os.path.exists(BOOK_FILE):
+            new_solver.load_book(BOOK_FILE, use_mmap=BOOK_MMAP)
+        else:
+            print(f"Warning: Opening book '{BOOK_FILE}' not found.", file=sys.stderr)
+        startup["stage"] = "ready"
+        startup["status"] = "ok"
+        startup["ready_after_s"] = round(time.monotonic() - startup["started"], 3)
+        print(f"AI Solver initialized successfully in {time.monotonic() - t0:.2f}s.", file=sys.stderr)
+    except Exception as e:
+        print(f"CRITICAL ERROR: Failed to initialize AI Solver: {e}", file=sys.stderr)
+        startup["status"] = "error"
+        startup["stage"] = f"failed: {type(e).__name__}"
+
+def save_tt_snapshot():
+    if not (TT_SNAPSHOT and solver is not None and solver.trans_table):
+        return
+    try:
+        with solver_lock:
+            written = solver.trans_table.save_snapshot(TT_SNAPSHOT)
+        print(f"Saved {written} TT entries to snapshot '{TT_SNAPSHOT}'.", file=sys.stderr)
+    except OSError as e:
+        print(f"Warning: Failed to save TT snapshot '{TT_SNAPSHOT}': {e}", file=sys.stderr)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("Initializing AI Solver in background...", file=sys.stderr)
+    threading.Thread(target=warm_up, name="solver-warmup", daemon=True).start()
+    yield
+    print("App shutdown: saving state...", file=sys.stderr)
+    save_tt_snapshot()
+    if SHARED_TT and solver is not None and solver.trans_table:
+        solver.trans_table.close() # Chỉ tách khỏi segment, các worker khác vẫn dùng
+    if recorder is not None:
+        recorder.close()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -45,28 +142,214 @@ class GameState(BaseModel):
 
 class AIResponse(BaseModel):
     move: int
+    tier: str = "solver" # Tầng đã trả lời: book | cache | solver | heuristic | fallback
 
-print("Initializing AI Solver...", file=sys.stderr)
-try:
-    solver = Solver()
-    book_filename = f"{Position.WIDTH}x{Position.HEIGHT}.book"
-    if os.path.exists(book_filename):
-        solver.load_book(book_filename)
+# --- Chính sách nhiều tầng: book / cache -> solver (trong ngân sách) -> heuristic -> valid_moves[0] ---
+SOLVER_BUDGET_MS = float(os.environ.get("SOLVER_BUDGET_MS", "3000")) # Thời gian tối đa cho solver (0 = không giới hạn)
+SOLVER_NODE_BUDGET = int(os.environ.get("SOLVER_NODE_BUDGET", "0")) # Số node tối đa cho solver (0 = không giới hạn)
+QUEUE_WAIT_MS = float(os.environ.get("QUEUE_WAIT_MS", "3000")) # Thời gian chờ solver tối đa (0 = chờ mãi)
+MAX_QUEUE = int(os.environ.get("MAX_QUEUE", "8")) # Đã có từng này request chờ solver -> dùng heuristic ngay
+HEURISTIC_DEPTH = int(os.environ.get("HEURISTIC_DEPTH", "6"))
+HEURISTIC_MS = float(os.environ.get("HEURISTIC_MS", "500"))
+ANALYSIS_CACHE_SIZE = int(os.environ.get("ANALYSIS_CACHE_SIZE", "4096")) # Số kết quả solver được nhớ (LRU)
+
+analysis_cache: "OrderedDict[int, List[int]]" = OrderedDict() # pos.key() -> điểm chính xác từng cột
+cache_lock = threading.Lock()
+
+recorder = RequestRecorder.from_env() # Ghi lại request khi đặt REQUEST_LOG=<path>, dùng với replay.py
+
+# --- Metrics (Prometheus text format, xem /metrics) ---
+START_TIME = time.monotonic()
+solver_lock = threading.Lock() # Solver không thread-safe: mỗi lúc chỉ một request được tìm kiếm
+
+registry = Registry()
+REQUESTS_TOTAL = registry.counter(
+    "connect4_requests_total", "Move requests served, by ply bucket.", ["ply"])
+REQUEST_LATENCY = registry.histogram(
+    "connect4_request_latency_seconds", "End-to-end move request latency, by ply bucket.", ["ply"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+SOLVER_NODES = registry.histogram(
+    "connect4_solver_nodes", "Negamax nodes explored per request, by ply bucket.", ["ply"],
+    buckets=(10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000))
+TT_PROBES = registry.counter("connect4_tt_probes_total", "Transposition table lookups.")
+TT_HITS = registry.counter("connect4_tt_hits_total", "Transposition table lookups that returned a bound.")
+BOOK_PROBES = registry.counter("connect4_book_probes_total", "Opening book lookups.")
+BOOK_HITS = registry.counter("connect4_book_hits_total", "Opening book lookups that returned a score.")
+ETC_PROBES = registry.counter("connect4_etc_probes_total", "Extra TT probes made by enhanced transposition cutoffs.")
+ETC_CUTOFFS = registry.counter("connect4_etc_cutoffs_total", "Subtrees skipped by enhanced transposition cutoffs.")
+NULL_WINDOW_PASSES = registry.counter("connect4_null_window_passes_total", "Null-window searches run by the solve driver.")
+registry.gauge("connect4_tt_hit_ratio", "TT hits / TT probes since start.",
+               callback=lambda: TT_HITS.get() / TT_PROBES.get() if TT_PROBES.get() else 0.0)
+registry.gauge("connect4_book_hit_ratio", "Book hits / book probes since start.",
+               callback=lambda: BOOK_HITS.get() / BOOK_PROBES.get() if BOOK_PROBES.get() else 0.0)
+registry.gauge("connect4_tt_fill_ratio", "Estimated fraction of occupied transposition table slots.",
+               callback=lambda: solver.trans_table.fill_ratio() if solver and solver.trans_table else 0.0)
+TIER_TOTAL = registry.counter("connect4_tier_total", "Move requests answered, by policy tier.", ["tier"])
+SOLVER_SKIPPED = registry.counter(
+    "connect4_solver_skipped_total", "Requests that fell back from the exact solver, by reason.", ["reason"])
+QUEUE_DEPTH = registry.gauge("connect4_queue_depth", "Requests waiting for the solver.")
+INFLIGHT = registry.gauge("connect4_inflight_requests", "Move requests currently being handled.")
+SOLVER_BUSY = registry.gauge("connect4_solver_busy", "1 while the solver is searching, else 0.")
+SOLVER_BUSY_SECONDS = registry.counter("connect4_solver_busy_seconds_total", "Wall time spent inside the solver.")
+registry.gauge("connect4_worker_utilisation", "Fraction of uptime this worker spent inside the solver.",
+               callback=lambda: SOLVER_BUSY_SECONDS.get() / max(time.monotonic() - START_TIME, 1e-9))
+registry.gauge("connect4_uptime_seconds", "Seconds since the worker started.",
+               callback=lambda: time.monotonic() - START_TIME)
+
+
+def analyze_with_metrics(pos: Position, ply: str) -> Optional[List[int]]:
+    """
+    Gọi solver.analyze dưới lock (trong ngân sách SOLVER_BUDGET_MS / SOLVER_NODE_BUDGET), ghi lại
+    queue depth, thời gian bận và các bộ đếm. Trả về None nếu hàng đợi đầy hoặc chờ lock quá
+    QUEUE_WAIT_MS; ném SearchAborted nếu hết ngân sách.
+    """
+    if MAX_QUEUE > 0 and QUEUE_DEPTH.get() >= MAX_QUEUE:
+        SOLVER_SKIPPED.inc(reason="queue_full")
+        return None
+    QUEUE_DEPTH.inc()
+    try:
+        acquired = solver_lock.acquire(timeout=QUEUE_WAIT_MS / 1000 if QUEUE_WAIT_MS > 0 else -1)
+    finally:
+        QUEUE_DEPTH.dec()
+    if not acquired:
+        SOLVER_SKIPPED.inc(reason="queue_wait")
+        return None
+    try:
+        SOLVER_BUSY.set(1)
+        solver.reset_stats()
+        solver.set_budget(max_nodes=SOLVER_NODE_BUDGET or None,
+                          max_seconds=SOLVER_BUDGET_MS / 1000 if SOLVER_BUDGET_MS > 0 else None)
+        start = time.perf_counter()
+        try:
+            return solver.analyze(pos, weak=False)
+        except SearchAborted:
+            SOLVER_SKIPPED.inc(reason="budget")
+            raise
+        finally:
+            solver.set_budget()
+            SOLVER_BUSY_SECONDS.inc(time.perf_counter() - start)
+            stats = solver.get_stats()
+            SOLVER_NODES.observe(stats["nodes"], ply=ply)
+            TT_PROBES.inc(stats["tt_probes"])
+            TT_HITS.inc(stats["tt_hits"])
+            BOOK_PROBES.inc(stats["book_probes"])
+            BOOK_HITS.inc(stats["book_hits"])
+            NULL_WINDOW_PASSES.inc(stats["null_window_passes"])
+            ETC_PROBES.inc(stats["etc_probes"])
+            ETC_CUTOFFS.inc(stats["etc_cutoffs"])
+            SOLVER_BUSY.set(0)
+    finally:
+        solver_lock.release()
+
+
+def book_scores(pos: Position) -> Optional[List[int]]:
+    """Điểm chính xác của mọi cột chỉ từ opening book, không cần lock; None nếu có cột không tra được."""
+    book = solver.book if solver is not None else None
+    if book is None or not book.is_loaded or pos.nb_moves() + 1 > book.depth:
+        return None
+    scores = [Solver.INVALID_MOVE] * Position.WIDTH
+    for col in range(Position.WIDTH):
+        if not pos.can_play(col):
+            continue
+        if pos.is_winning_move(col):
+            scores[col] = (Position.WIDTH * Position.HEIGHT + 1 - pos.nb_moves()) // 2
+            continue
+        p2 = pos.copy()
+        p2.play_col(col)
+        if p2.can_win_next():
+            scores[col] = -((Position.WIDTH * Position.HEIGHT + 1 - p2.nb_moves()) // 2)
+            continue
+        value = book.get(p2)
+        if value == 0:
+            return None
+        scores[col] = -(value + Position.MIN_SCORE - 1)
+    return scores
+
+def cache_get(key: int) -> Optional[List[int]]:
+    with cache_lock:
+        scores = analysis_cache.get(key)
+        if scores is not None:
+            analysis_cache.move_to_end(key)
+        return scores
+
+def cache_put(key: int, scores: List[int]):
+    if ANALYSIS_CACHE_SIZE <= 0:
+        return
+    with cache_lock:
+        analysis_cache[key] = scores
+        analysis_cache.move_to_end(key)
+        while len(analysis_cache) > ANALYSIS_CACHE_SIZE:
+            analysis_cache.popitem(last=False)
+
+def tiered_scores(pos: Position, ply: str, solver_available: bool):
+    """
+    Chấm điểm các cột theo từng tầng: book, cache, solver trong ngân sách, rồi heuristic
+    alpha-beta. Trả về (scores, tier, invalid_value).
+    """
+    if solver_available:
+        scores = book_scores(pos)
+        if scores is not None:
+            return scores, "book", Solver.INVALID_MOVE
+        scores = cache_get(pos.key())
+        if scores is not None:
+            return scores, "cache", Solver.INVALID_MOVE
+        try:
+            scores = analyze_with_metrics(pos, ply)
+        except SearchAborted as e:
+            print(f"Solver gave up: {e}", file=sys.stderr)
+            scores = None
+        if scores is not None:
+            cache_put(pos.key(), scores)
+            return scores, "solver", Solver.INVALID_MOVE
     else:
-        print(f"Warning: Opening book '{book_filename}' not found.", file=sys.stderr)
-    print("AI Solver initialized successfully.", file=sys.stderr)
-except Exception as e:
-    print(f"CRITICAL ERROR: Failed to initialize AI Solver: {e}", file=sys.stderr)
-    solver = None
+        SOLVER_SKIPPED.inc(reason="unavailable")
+
+    print(f"Falling back to heuristic search (depth <= {HEURISTIC_DEPTH}, {HEURISTIC_MS:.0f} ms)...", file=sys.stderr)
+    search = HeuristicSearch(max_depth=HEURISTIC_DEPTH)
+    scores = search.analyze(pos, max_seconds=HEURISTIC_MS / 1000 if HEURISTIC_MS > 0 else None)
+    print(f"Heuristic reached depth {search.last_depth} ({search.last_nodes} nodes).", file=sys.stderr)
+    return scores, "heuristic", HeuristicSearch.INVALID_MOVE
+
+
+@app.get("/metrics")
+def metrics():
+    return Response(content=registry.render(), media_type=Registry.CONTENT_TYPE)
 
 @app.get("/api/test")
 async def health_check():
-    return {"status": "ok", "message": "Server is running"}
+    if startup["status"] == "ok":
+        return {"status": "ok", "message": "Server is running", "ready_after_s": startup["ready_after_s"]}
+    if startup["status"] == "error":
+        return {"status": "error", "message": f"AI Solver failed to initialize ({startup['stage']})"}
+    return {"status": "warming", "message": f"Server is running, AI Solver is warming up ({startup['stage']})",
+            "serving": solver_ready.is_set(), "uptime_s": round(time.monotonic() - startup["started"], 3)}
 
 @app.post("/api/connect4-move", response_model=AIResponse)
-async def make_move(game_state: GameState) -> AIResponse:
-    if solver is None:
-         raise HTTPException(status_code=500, detail="AI Solver is not available.")
+def make_move(game_state: GameState) -> AIResponse:
+    # Endpoint đồng bộ: FastAPI chạy nó trong threadpool, các request chờ solver_lock (queue depth)
+    start = time.perf_counter()
+    ply = ply_bucket(sum(1 for row in game_state.board for cell in row if cell != 0))
+    INFLIGHT.inc()
+    response = None
+    try:
+        response = _make_move(game_state, ply)
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        INFLIGHT.dec()
+        REQUESTS_TOTAL.inc(ply=ply)
+        REQUEST_LATENCY.observe(elapsed, ply=ply)
+        if response is not None:
+            TIER_TOTAL.inc(tier=response.tier)
+        if recorder is not None:
+            recorder.record(game_state.board, game_state.current_player, game_state.valid_moves,
+                            elapsed * 1000, move=response.move if response is not None else None)
+
+def _make_move(game_state: GameState, ply: str) -> AIResponse:
+    # Solver chưa sẵn sàng (đang khởi động hoặc lỗi) -> vẫn trả lời bằng heuristic
+    solver_available = solver_ready.wait(timeout=WARMUP_WAIT) and solver is not None
+    if not solver_available:
+         print(f"AI Solver not available ({startup['stage']}).", file=sys.stderr)
 
     print(f"\n=== Request Received ===", file=sys.stderr)
     print(f"Player Turn: {game_state.current_player}", file=sys.stderr)
@@ -82,44 +365,10 @@ async def make_move(game_state: GameState) -> AIResponse:
             print("Error: Received request with no valid moves.", file=sys.stderr)
             raise ValueError("No valid moves available")
 
-        # === Sửa đổi phần chuyển đổi board ===
-        board_list = game_state.board
+        # === Chuyển đổi board (API hàng 0 = trên cùng) sang bitboard ===
         api_current_player = game_state.current_player
-        if not (1 <= api_current_player <= 2):
-             raise ValueError(f"Invalid current_player value: {api_current_player}")
-
-        pos = Position()
-        player1_mask = 0
-        player2_mask = 0
-        moves_count = 0
-
-        if len(board_list) != Position.HEIGHT or len(board_list[0]) != Position.WIDTH:
-             raise ValueError(f"Invalid board dimensions: {len(board_list)}x{len(board_list[0]) if board_list else 'N/A'}")
-
-        # --- Giả định API board_list[0] là hàng TRÊN CÙNG ---
         print("Converting API board (assuming top-down) to bitboard (bottom-up)...", file=sys.stderr)
-        for r_api in range(Position.HEIGHT):
-            for c in range(Position.WIDTH):
-                # Chuyển đổi index hàng API (0=top) sang index hàng bitboard (0=bottom)
-                r_internal = Position.HEIGHT - 1 - r_api
-
-                player_num = board_list[r_api][c] # Lấy từ API board
-                if player_num != 0:
-                    # Tính bitmask với index hàng internal
-                    cell_mask = 1 << (r_internal + c * (Position.HEIGHT + 1))
-                    pos.mask |= cell_mask
-                    moves_count += 1
-                    if player_num == 1:
-                        player1_mask |= cell_mask
-                    elif player_num == 2:
-                        player2_mask |= cell_mask
-
-        pos.moves = moves_count
-        if api_current_player == 1:
-            pos.current_position = player1_mask
-        else:
-            pos.current_position = player2_mask
-        # ---------------------------------------
+        pos = Position.from_board(game_state.board, api_current_player)
 
         print(f"Converted Position Object:", file=sys.stderr)
         print(f"  Moves: {pos.moves}", file=sys.stderr)
@@ -129,10 +378,10 @@ async def make_move(game_state: GameState) -> AIResponse:
         print("-" * 20, file=sys.stderr)
 
 
-        # Gọi Solver
-        print("Analyzing position with solver...", file=sys.stderr)
-        scores = solver.analyze(pos, weak=False)
-        print(f"AI Raw Scores: {scores}", file=sys.stderr)
+        # Gọi Solver (theo chính sách nhiều tầng)
+        print("Analyzing position...", file=sys.stderr)
+        scores, tier, invalid_score = tiered_scores(pos, ply, solver_available)
+        print(f"AI Raw Scores ({tier}): {scores}", file=sys.stderr)
 
         # Chọn nước đi tốt nhất
         best_score = -float('inf')
@@ -143,7 +392,7 @@ async def make_move(game_state: GameState) -> AIResponse:
             if 0 <= valid_col < Position.WIDTH:
                 score = scores[valid_col]
                 print(f"  Col {valid_col+1}: Score={score}", file=sys.stderr) # Log điểm từng cột hợp lệ
-                if score != Solver.INVALID_MOVE: # Chỉ xem xét các nước hợp lệ theo solver
+                if score != invalid_score: # Chỉ xem xét các nước hợp lệ theo solver
                     if score > best_score:
                         best_score = score
                         best_moves = [valid_col]
@@ -159,6 +408,7 @@ async def make_move(game_state: GameState) -> AIResponse:
             print(f"Error: AI could not find any valid moves among {game_state.valid_moves} with scores {scores}. Falling back.", file=sys.stderr)
             if game_state.valid_moves:
                  selected_move = game_state.valid_moves[0]
+                 tier = "fallback"
                  print(f"Falling back to first valid move: {selected_move}", file=sys.stderr)
             else:
                  raise ValueError("No valid moves available and AI failed.")
@@ -166,8 +416,8 @@ async def make_move(game_state: GameState) -> AIResponse:
             selected_move = random.choice(best_moves)
             print(f"AI analysis complete. Best score: {best_score}. Recommended moves: {[m+1 for m in best_moves]}. Chosen column index: {selected_move}", file=sys.stderr)
 
-        print(f"=== Sending Response: {{'move': {selected_move}}} ===", file=sys.stderr)
-        return AIResponse(move=selected_move)
+        print(f"=== Sending Response: {{'move': {selected_move}, 'tier': '{tier}'}} ===", file=sys.stderr)
+        return AIResponse(move=selected_move, tier=tier)
 
     # --- Xử lý lỗi (giữ nguyên hoặc cải thiện) ---
     except ValueError as ve:
@@ -175,7 +425,7 @@ async def make_move(game_state: GameState) -> AIResponse:
         if game_state.valid_moves:
             selected_move = game_state.valid_moves[0]
             print(f"Falling back to first valid move {selected_move} due to error.", file=sys.stderr)
-            return AIResponse(move=selected_move)
+            return AIResponse(move=selected_move, tier="fallback")
         else:
             raise HTTPException(status_code=400, detail=f"Client Error: {ve} and no valid moves.")
     except Exception as e:
@@ -185,7 +435,7 @@ async def make_move(game_state: GameState) -> AIResponse:
         if game_state.valid_moves:
              selected_move = game_state.valid_moves[0]
              print(f"Falling back to first valid move {selected_move} due to internal error.", file=sys.stderr)
-             return AIResponse(move=selected_move)
+             return AIResponse(move=selected_move, tier="fallback")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {type(e).__name__}")
 
 if __name__ == "__main__":
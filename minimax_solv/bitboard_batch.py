@@ -0,0 +1,184 @@
+"""
+Vectorised versions of the Position bitboard operations, working on whole
+batches of positions stored as two uint64 NumPy arrays (current_position,
+mask) with the same layout as Position. Meant for book generation, dataset
+filtering and rollouts where millions of positions are processed and the
+per-position interpreter overhead of Position dominates.
+"""
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    from .position import Position
+except ImportError:
+    from position import Position
+
+WIDTH = Position.WIDTH
+HEIGHT = Position.HEIGHT
+
+BOTTOM_MASK = np.uint64(Position.BOTTOM_MASK)
+BOARD_MASK = np.uint64(Position.BOARD_MASK)
+COLUMN_MASKS = np.array([Position.column_mask(c) for c in range(WIDTH)], dtype=np.uint64)
+BOTTOM_MASKS = np.array([Position.bottom_mask_col(c) for c in range(WIDTH)], dtype=np.uint64)
+TOP_MASKS = np.array([Position.top_mask_col(c) for c in range(WIDTH)], dtype=np.uint64)
+
+_ONE = np.uint64(1)
+# Bước dịch cho 4 hướng: dọc, ngang, chéo /, chéo \
+_SHIFTS = [np.uint64(s) for s in (1, HEIGHT + 1, HEIGHT, HEIGHT + 2)]
+
+
+def _u64(a) -> np.ndarray:
+    return np.asarray(a, dtype=np.uint64)
+
+
+if hasattr(np, "bitwise_count"): # NumPy >= 2.0
+    def popcount(a) -> np.ndarray:
+        return np.bitwise_count(_u64(a)).astype(np.int64)
+else:
+    def popcount(a) -> np.ndarray:
+        a = _u64(a)
+        a = a - ((a >> np.uint64(1)) & np.uint64(0x5555555555555555))
+        a = (a & np.uint64(0x3333333333333333)) + ((a >> np.uint64(2)) & np.uint64(0x3333333333333333))
+        a = (a + (a >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+        return ((a * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+
+def compute_winning_position(position, mask) -> np.ndarray:
+    """Batch version of Position.compute_winning_position: empty cells completing a 4-in-a-row."""
+    position = _u64(position)
+    mask = _u64(mask)
+    # Dọc: chỉ cần 3 quân phía dưới
+    r = (position << _ONE) & (position << np.uint64(2)) & (position << np.uint64(3))
+    for s in _SHIFTS[1:]:
+        s2 = s * np.uint64(2)
+        s3 = s * np.uint64(3)
+        p = (position << s) & (position << s2)
+        r |= p & (position << s3)
+        r |= p & (position >> s)
+        p = (position >> s) & (position >> s2)
+        r |= p & (position << s)
+        r |= p & (position >> s3)
+    return r & (BOARD_MASK ^ mask)
+
+
+def possible(mask) -> np.ndarray:
+    """Bitmap of the playable cell of every non-full column."""
+    return (_u64(mask) + BOTTOM_MASK) & BOARD_MASK
+
+
+def winning_position(current_position, mask) -> np.ndarray:
+    return compute_winning_position(current_position, mask)
+
+
+def opponent_winning_position(current_position, mask) -> np.ndarray:
+    return compute_winning_position(_u64(current_position) ^ _u64(mask), mask)
+
+
+def can_win_next(current_position, mask) -> np.ndarray:
+    """Bool array: the player to move has an immediate win."""
+    return (winning_position(current_position, mask) & possible(mask)) != 0
+
+
+def possible_non_losing_moves(current_position, mask) -> np.ndarray:
+    """
+    Batch version of Position.possible_non_losing_moves (assumes no immediate
+    win, like the scalar one): 0 where every move loses.
+    """
+    _possible = possible(mask)
+    opponent_win = opponent_winning_position(current_position, mask)
+    forced = _possible & opponent_win
+    several_forced = (forced & (forced - _ONE)) != 0 # forced == 0: 0 - 1 tràn thành 0xFF..FF, & 0 vẫn là 0
+    _possible = np.where(forced != 0, forced, _possible)
+    return np.where(several_forced, np.uint64(0), _possible & ~(opponent_win >> _ONE))
+
+
+def legal_columns(mask) -> np.ndarray:
+    """Bool array of shape (n, WIDTH): column c can still be played."""
+    return (_u64(mask)[..., None] & TOP_MASKS) == 0
+
+
+def column_move(mask, cols) -> np.ndarray:
+    """Bitmap of the cell a stone dropped in `cols` lands on (0 when the column is full)."""
+    mask = _u64(mask)
+    cols = np.asarray(cols, dtype=np.intp)
+    return (mask + BOTTOM_MASKS[cols]) & COLUMN_MASKS[cols]
+
+
+def is_winning_move(current_position, mask, cols) -> np.ndarray:
+    return (winning_position(current_position, mask) & column_move(mask, cols)) != 0
+
+
+def play(current_position, mask, move) -> Tuple[np.ndarray, np.ndarray]:
+    """Plays `move` (bitmaps, one per position); returns the new (current_position, mask)."""
+    mask = _u64(mask)
+    return _u64(current_position) ^ mask, mask | _u64(move)
+
+
+def play_col(current_position, mask, cols) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Drops one stone per position in `cols`. Positions whose column is full
+    are returned unchanged (check legal_columns() first when that matters).
+    """
+    current_position = _u64(current_position)
+    mask = _u64(mask)
+    move = column_move(mask, cols)
+    played = move != 0
+    new_cur, new_mask = play(current_position, mask, move)
+    return np.where(played, new_cur, current_position), np.where(played, new_mask, mask)
+
+
+def nb_moves(mask) -> np.ndarray:
+    return popcount(mask)
+
+
+def key(current_position, mask) -> np.ndarray:
+    return _u64(current_position) + _u64(mask)
+
+
+def from_positions(positions: List[Position]) -> Tuple[np.ndarray, np.ndarray]:
+    """Packs Position objects into (current_position, mask) arrays."""
+    cur = np.fromiter((p.current_position for p in positions), dtype=np.uint64, count=len(positions))
+    mask = np.fromiter((p.mask for p in positions), dtype=np.uint64, count=len(positions))
+    return cur, mask
+
+
+def to_positions(current_position, mask) -> List[Position]:
+    """Unpacks arrays back into Position objects."""
+    positions = []
+    for cur, m in zip(_u64(current_position).tolist(), _u64(mask).tolist()):
+        p = Position()
+        p.current_position = cur
+        p.mask = m
+        p.moves = Position.popcount(m)
+        positions.append(p)
+    return positions
+
+
+if __name__ == "__main__":
+    # So sánh kết quả và tốc độ với Position trên các thế cờ ngẫu nhiên: python bitboard_batch.py [n]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = np.random.default_rng(0)
+    cur = np.zeros(n, dtype=np.uint64)
+    mask = np.zeros(n, dtype=np.uint64)
+    plies = rng.integers(0, WIDTH * HEIGHT - 6, size=n)
+    for ply in range(int(plies.max())):
+        legal = legal_columns(mask)
+        cols = np.argmax(np.where(legal, rng.random((n, WIDTH)), -1.0), axis=1) # Cột hợp lệ ngẫu nhiên
+        active = (ply < plies) & ~is_winning_move(cur, mask, cols)
+        new_cur, new_mask = play_col(cur, mask, cols)
+        cur = np.where(active, new_cur, cur)
+        mask = np.where(active, new_mask, mask)
+
+    positions = to_positions(cur, mask)
+    t0 = time.perf_counter()
+    expected = [p.possible_non_losing_moves() for p in positions]
+    scalar_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = possible_non_losing_moves(cur, mask)
+    batch_s = time.perf_counter() - t0
+    mismatches = sum(1 for e, g in zip(expected, got.tolist()) if e != g)
+    print(f"{n} positions: Position {scalar_s * 1000:.1f} ms, batch {batch_s * 1000:.1f} ms "
+          f"({scalar_s / max(batch_s, 1e-9):.0f}x), mismatches: {mismatches}")
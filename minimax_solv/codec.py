@@ -0,0 +1,272 @@
+"""
+Binary formats for piping positions between gen.py, score.py, main.py and
+the book builder without printing and replaying ASCII move strings:
+
+- positions: fixed 16-byte records (current_position, mask), little-endian uint64
+- scored:    17-byte records (current_position, mask, score as int8)
+- moves:     packed move sequences, 1 length byte + 3 bits per move (0-based column)
+
+Every file / stream starts with a 4-byte magic naming its format, so the
+tools accept either text or any binary format on stdin (read_records()).
+"""
+import io
+import itertools
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from .position import Position
+except ImportError:
+    from position import Position
+
+MAGIC_POSITIONS = b"C4P\x01"
+MAGIC_SCORED = b"C4S\x01"
+MAGIC_MOVES = b"C4M\x01"
+KINDS = {"positions": MAGIC_POSITIONS, "scored": MAGIC_SCORED, "moves": MAGIC_MOVES}
+_KIND_OF_MAGIC = {magic: kind for kind, magic in KINDS.items()}
+
+_POSITION = struct.Struct("<QQ")
+_SCORED = struct.Struct("<QQb")
+_MOVE_BITS = 3 # 7 cột vừa 3 bit
+_CHUNK_RECORDS = 4096
+
+# (label, position, score): label là chuỗi nước đi nếu có, position None nếu dữ liệu không hợp lệ
+Record = Tuple[str, Optional[Position], Optional[int]]
+
+
+def position_label(current_position: int, mask: int) -> str:
+    """Text form of a binary position record (no move string is stored)."""
+    return f"{current_position:#x}/{mask:#x}"
+
+
+# --- Bản ghi đơn ---
+
+def encode_position(p: Position, score: Optional[int] = None) -> bytes:
+    if score is None:
+        return _POSITION.pack(p.current_position, p.mask)
+    return _SCORED.pack(p.current_position, p.mask, score)
+
+
+def encode_moves(seq: str) -> bytes:
+    """Packs a 1-based move string ("4453") into 1 + ceil(3n/8) bytes."""
+    value = 0
+    for i, ch in enumerate(seq):
+        col = ord(ch) - 49 # '1' -> 0
+        if not 0 <= col < Position.WIDTH:
+            raise ValueError(f"Invalid move '{ch}' in '{seq}'")
+        value |= col << (_MOVE_BITS * i)
+    if len(seq) > 255:
+        raise ValueError(f"Move sequence too long ({len(seq)} moves)")
+    return bytes((len(seq),)) + value.to_bytes((_MOVE_BITS * len(seq) + 7) // 8, "little")
+
+
+def decode_moves(data: bytes, offset: int = 0) -> Tuple[str, int]:
+    """Unpacks the move string at `offset`; returns (seq, offset of the next record)."""
+    n = data[offset]
+    end = offset + 1 + (_MOVE_BITS * n + 7) // 8
+    if end > len(data):
+        raise ValueError("Truncated move record")
+    value = int.from_bytes(data[offset + 1:end], "little")
+    seq = "".join(chr(49 + ((value >> (_MOVE_BITS * i)) & 7)) for i in range(n))
+    return seq, end
+
+
+# --- Cả file / cả buffer ---
+
+def encode_positions(current_positions: Sequence[int], masks: Sequence[int],
+                     scores: Optional[Sequence[int]] = None) -> bytes:
+    """Whole "positions" (or "scored", when `scores` is given) file content, header included."""
+    if scores is None:
+        words = array("Q", bytes(16 * len(masks)))
+        words[0::2] = array("Q", current_positions)
+        words[1::2] = array("Q", masks)
+        if sys.byteorder != "little": words.byteswap()
+        return MAGIC_POSITIONS + words.tobytes()
+    out = bytearray(MAGIC_SCORED)
+    for record in zip(current_positions, masks, scores):
+        out += _SCORED.pack(*record)
+    return bytes(out)
+
+
+def decode_positions(data: bytes) -> Tuple[array, array, Optional[array]]:
+    """
+    Inverse of encode_positions(): (current_positions, masks, scores) as
+    arrays ('Q', 'Q', 'b'); scores is None for a "positions" file.
+    """
+    magic, body = bytes(data[:4]), memoryview(data)[4:]
+    if magic == MAGIC_POSITIONS:
+        if len(body) % _POSITION.size:
+            raise ValueError("Truncated position file")
+        words = array("Q")
+        words.frombytes(body)
+        if sys.byteorder != "little": words.byteswap()
+        return words[0::2], words[1::2], None
+    if magic == MAGIC_SCORED:
+        if len(body) % _SCORED.size:
+            raise ValueError("Truncated scored position file")
+        cur, mask, scores = array("Q"), array("Q"), array("b")
+        for c, m, s in _SCORED.iter_unpack(body):
+            cur.append(c); mask.append(m); scores.append(s)
+        return cur, mask, scores
+    raise ValueError(f"Not a position file (magic {magic!r})")
+
+
+def encode_move_list(seqs: Iterable[str]) -> bytes:
+    return MAGIC_MOVES + b"".join(encode_moves(seq) for seq in seqs)
+
+
+def decode_move_list(data: bytes) -> List[str]:
+    if bytes(data[:4]) != MAGIC_MOVES:
+        raise ValueError(f"Not a move sequence file (magic {bytes(data[:4])!r})")
+    seqs, offset = [], 4
+    while offset < len(data):
+        seq, offset = decode_moves(data, offset)
+        seqs.append(seq)
+    return seqs
+
+
+def read_file(filename: str):
+    """Bulk-loads a binary file: ("moves", [seq, ...]) or (kind, (cur, masks, scores))."""
+    with open(filename, "rb") as f:
+        data = f.read()
+    kind = _KIND_OF_MAGIC.get(data[:4])
+    if kind == "moves":
+        return kind, decode_move_list(data)
+    if kind is None:
+        raise ValueError(f"'{filename}' is not a binary position file")
+    return kind, decode_positions(data)
+
+
+# --- Luồng (stdin / stdout) ---
+
+class RecordWriter:
+    """Streams records of one kind ("positions", "scored" or "moves") to a binary stream."""
+
+    def __init__(self, stream: BinaryIO, kind: str):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown record kind '{kind}', expected one of {tuple(KINDS)}")
+        self.stream = stream
+        self.kind = kind
+        self.count = 0
+        stream.write(KINDS[kind])
+
+    def write(self, p: Optional[Position] = None, score: Optional[int] = None, seq: Optional[str] = None):
+        if self.kind == "moves":
+            self.stream.write(encode_moves(seq))
+        elif self.kind == "scored":
+            self.stream.write(encode_position(p, score))
+        else:
+            self.stream.write(encode_position(p))
+        self.count += 1
+
+    def flush(self):
+        self.stream.flush()
+
+
+def detect_format(stream: BinaryIO) -> Tuple[str, bytes]:
+    """
+    Reads the first 4 bytes of a binary stream (fewer at EOF) and returns
+    (kind, those bytes): kind is a KINDS key or "text". A pipe can deliver
+    the magic in several reads, so this loops instead of trusting one
+    read()/peek(); a "text" caller must put the bytes back in front.
+    """
+    head = b""
+    while len(head) < 4:
+        chunk = stream.read(4 - len(head))
+        if not chunk:
+            break
+        head += chunk
+    return _KIND_OF_MAGIC.get(head, "text"), head
+
+
+def read_records(stream: Optional[BinaryIO] = None) -> Iterator[Record]:
+    """
+    Yields (label, Position, score) from text lines ("<moves> [score]") or
+    any binary format, detected from the first bytes (default: stdin).
+    Invalid entries are yielded with position None so callers can report them.
+    """
+    for _, record in read_numbered_records(stream):
+        yield record
+
+
+def read_numbered_records(stream: Optional[BinaryIO] = None) -> Iterator[Tuple[int, Record]]:
+    """
+    read_records() with the 1-based number of each entry: its physical line
+    in text input (blank lines are skipped but still counted), its record
+    index in binary input.
+    """
+    stream = stream if stream is not None else sys.stdin.buffer
+    if not isinstance(stream, io.BufferedIOBase): # Luồng raw: read(n) có thể trả về ít hơn n byte
+        stream = io.BufferedReader(stream)
+    kind, head = detect_format(stream)
+    if kind == "text":
+        lines = io.TextIOWrapper(stream, encoding="ascii", errors="replace")
+        # Trả lại các byte đã đọc để nhận dạng vào đầu dòng đầu tiên
+        first = head.decode("ascii", errors="replace").split("\n")
+        first = [line + "\n" for line in first[:-1]] + [first[-1] + lines.readline()]
+        for line_num, line in enumerate(itertools.chain(first, lines), 1):
+            parts = line.split()
+            if not parts:
+                continue
+            score = None
+            if len(parts) > 1:
+                try:
+                    score = int(parts[1])
+                except ValueError:
+                    yield line_num, (line.strip(), None, None)
+                    continue
+            yield line_num, _replay(parts[0], score)
+        return
+    index = 0
+    if kind == "moves":
+        while True:
+            head = stream.read(1)
+            if not head:
+                return
+            body = stream.read((_MOVE_BITS * head[0] + 7) // 8)
+            seq, _ = decode_moves(head + body)
+            index += 1
+            yield index, _replay(seq, None)
+    record = _SCORED if kind == "scored" else _POSITION
+    while True:
+        chunk = stream.read(record.size * _CHUNK_RECORDS)
+        if not chunk:
+            return
+        if len(chunk) % record.size: # Bản ghi cuối bị cắt: đọc nốt phần còn lại
+            chunk += stream.read(record.size - len(chunk) % record.size)
+            if len(chunk) % record.size:
+                raise ValueError("Truncated binary position stream")
+        for fields in record.iter_unpack(chunk):
+            index += 1
+            yield index, (position_label(fields[0], fields[1]), Position.from_bitboards(fields[0], fields[1]),
+                          fields[2] if kind == "scored" else None)
+
+
+def _replay(seq: str, score: Optional[int]) -> Record:
+    p = Position()
+    return seq, (p if p.play_seq(seq) == len(seq) else None), score
+
+
+if __name__ == "__main__":
+    # Chuyển đổi text <-> nhị phân:
+    #   python codec.py encode [positions|scored|moves] < text > bin
+    #   python codec.py decode < bin > text
+    command = sys.argv[1] if len(sys.argv) > 1 else "decode"
+    if command == "encode":
+        out_kind = sys.argv[2] if len(sys.argv) > 2 else "positions"
+        writer = RecordWriter(sys.stdout.buffer, out_kind)
+        for label, pos, sc in read_records():
+            if pos is None or (out_kind == "scored" and sc is None):
+                print(f"Invalid entry skipped: {label}", file=sys.stderr)
+                continue
+            writer.write(pos, sc, seq=label)
+        writer.flush()
+        print(f"Encoded {writer.count} {out_kind} records.", file=sys.stderr)
+    elif command == "decode":
+        for label, pos, sc in read_records():
+            print(label if sc is None else f"{label} {sc}")
+    else:
+        print(f"Usage: python codec.py encode [{'|'.join(KINDS)}] | decode", file=sys.stderr)
+        sys.exit(1)
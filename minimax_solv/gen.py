@@ -3,22 +3,26 @@
 import sys
 import math
 import os
-from typing import Set
+from typing import Optional, Set
 
 # Assumes position.py, opening_book.py, transposition_table.py are importable
 try:
     from .position import Position
     from .opening_book import OpeningBook
     from .transposition_table import TranspositionTable
+    from .codec import RecordWriter, read_records
 except ImportError:
     # Fallback for running standalone
     from position import Position
     from opening_book import OpeningBook
     from transposition_table import TranspositionTable
+    from codec import RecordWriter, read_records
 
 
 # Global set to track visited symmetric positions during exploration
 visited: Set[int] = set()
+# Khi khác None, explore() ghi bản ghi nhị phân (codec.py) thay vì in chuỗi nước đi
+writer: Optional[RecordWriter] = None
 
 def explore(p: Position, move_str: str, depth: int):
     """
@@ -36,7 +40,10 @@ def explore(p: Position, move_str: str, depth: int):
 
     # Print position if it's within the desired depth range
     if nb_moves <= depth:
-        print(move_str)
+        if writer is not None:
+            writer.write(p, seq=move_str)
+        else:
+            print(move_str)
 
     # Stop exploring further if max depth is reached
     if nb_moves >= depth:
@@ -59,7 +66,7 @@ def generate_opening_book():
     Input Format (stdin):
         Each line: <move_sequence> <score>
         Example: 443 10
-        Input ends with EOF or an empty line.
+        or binary "scored" records (codec.py), e.g. from score.py --binary.
 
     Output:
         Generates a file named like "WIDTHxHEIGHT.book".
@@ -90,35 +97,17 @@ def generate_opening_book():
 
     count = 0
     processed_count = 0
-    for line in sys.stdin:
+    # stdin: các dòng "<moves> <score>" hoặc bản ghi nhị phân "scored" của score.py --binary (codec.py)
+    for label, p, score in read_records():
         count += 1
-        line = line.strip()
-        if not line:
-            break # Stop on empty line
-
-        parts = line.split(' ', 1)
-        if len(parts) != 2:
-            print(f"Invalid line format (line {count} ignored): {line}", file=sys.stderr)
+        if p is None:
+            print(f"Invalid position '{label}' (entry {count} ignored)", file=sys.stderr)
             continue
-
-        pos_str, score_str = parts
-
-        try:
-            score = int(score_str)
-        except ValueError:
-            print(f"Invalid score format (line {count} ignored): {line}", file=sys.stderr)
-            continue
-
-        p = Position()
-        # play_seq returns the number of moves successfully played
-        moves_played = p.play_seq(pos_str)
-
-        # Validate line data
-        if moves_played != len(pos_str):
-            print(f"Invalid position sequence '{pos_str}' (line {count} ignored): {line}", file=sys.stderr)
+        if score is None:
+            print(f"Missing score (entry {count} ignored): {label}", file=sys.stderr)
             continue
         if not (Position.MIN_SCORE <= score <= Position.MAX_SCORE):
-            print(f"Score out of range [{Position.MIN_SCORE}, {Position.MAX_SCORE}] (line {count} ignored): {line}", file=sys.stderr)
+            print(f"Score out of range [{Position.MIN_SCORE}, {Position.MAX_SCORE}] (entry {count} ignored): {label} {score}", file=sys.stderr)
             continue
 
         # Normalize score to fit uint8_t (1 to MAX_SCORE - MIN_SCORE + 1)
@@ -126,7 +115,7 @@ def generate_opening_book():
         normalized_score = score - Position.MIN_SCORE + 1
 
         if not (1 <= normalized_score <= 255):
-             print(f"Normalized score {normalized_score} out of range [1, 255] (line {count} ignored): {line}", file=sys.stderr)
+             print(f"Normalized score {normalized_score} out of range [1, 255] (entry {count} ignored): {label}", file=sys.stderr)
              continue
 
         # Store in table using symmetric key (key3)
@@ -136,7 +125,7 @@ def generate_opening_book():
         if processed_count % 1000000 == 0:
             print(f"Processed {processed_count} valid lines...", file=sys.stderr)
 
-    print(f"Finished reading stdin. Processed {processed_count} valid lines out of {count-1}.", file=sys.stderr)
+    print(f"Finished reading stdin. Processed {processed_count} valid entries out of {count}.", file=sys.stderr)
 
     if processed_count == 0:
         print("No valid lines processed. Opening book will not be saved.", file=sys.stderr)
@@ -169,19 +158,26 @@ def generate_opening_book():
 # --- Main Execution Block ---
 if __name__ == "__main__":
     if len(sys.argv) > 1:
-        # Explore mode
+        # Explore mode: python gen.py <max_depth> [positions|moves] (định dạng nhị phân ra stdout)
         try:
             max_depth = int(sys.argv[1])
             if max_depth < 0:
                 raise ValueError("Depth cannot be negative.")
-            print(f"Exploring unique positions up to depth {max_depth}...")
+            if len(sys.argv) > 2:
+                if sys.argv[2] not in ("positions", "moves"):
+                    raise ValueError(f"Unknown output format '{sys.argv[2]}'.")
+                writer = RecordWriter(sys.stdout.buffer, sys.argv[2])
+            log = sys.stderr if writer is not None else sys.stdout
+            print(f"Exploring unique positions up to depth {max_depth}...", file=log)
             # Initial call with empty position and empty move string
             explore(Position(), "", max_depth)
-            print("Exploration finished.")
+            if writer is not None:
+                writer.flush()
+            print("Exploration finished.", file=log)
         except ValueError as e:
-            print(f"Error: Invalid depth argument '{sys.argv[1]}'. {e}", file=sys.stderr)
-            print("Usage: python generator.py [max_depth]", file=sys.stderr)
+            print(f"Error: Invalid argument. {e}", file=sys.stderr)
+            print("Usage: python gen.py [max_depth [positions|moves]]", file=sys.stderr)
             sys.exit(1)
     else:
-        # Generate opening book mode (reads from stdin)
-        generate_opening_book()
\ No newline at end of file
+        # Generate opening book mode (reads text or binary scored records from stdin)
+        generate_opening_book()
@@ -0,0 +1,155 @@
+import sys
+import time
+from typing import List, Optional
+
+try:
+    from .position import Position
+except ImportError:
+    from position import Position
+
+
+class HeuristicTimeout(Exception):
+    """Raised inside HeuristicSearch when its deadline passes."""
+
+
+# Tất cả cửa sổ 4 ô (ngang, dọc, hai đường chéo) dưới dạng bitmask trên bitboard
+def _build_windows() -> List[int]:
+    h1 = Position.HEIGHT + 1
+    windows = []
+    for col in range(Position.WIDTH):
+        for row in range(Position.HEIGHT):
+            for d_col, d_row in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                end_col = col + 3 * d_col
+                end_row = row + 3 * d_row
+                if not (0 <= end_col < Position.WIDTH and 0 <= end_row < Position.HEIGHT):
+                    continue
+                mask = 0
+                for i in range(4):
+                    mask |= 1 << ((col + i * d_col) * h1 + row + i * d_row)
+                windows.append(mask)
+    return windows
+
+WINDOWS = _build_windows() # 69 cửa sổ trên bàn 7x6
+CENTER_MASK = Position.column_mask(Position.WIDTH // 2)
+
+# Trọng số của evaluate_window() (minimax+alphabeta/minimax5.py), chỉ số = số quân trong cửa sổ
+_OWN_WEIGHTS = (0, 1, 50, 500, 100000)
+_OPP_WEIGHTS = (0, -1, -100, -1000, -100000)
+CENTER_WEIGHT = 6
+
+WIN_SCORE = 1_000_000
+
+
+def evaluate(p: Position) -> int:
+    """
+    score_board() của minimax+alphabeta trên bitboard, từ góc nhìn người sắp đi:
+    cộng điểm các cửa sổ chỉ chứa quân mình, trừ điểm các cửa sổ chỉ chứa quân đối thủ.
+    """
+    own = p.current_position
+    opp = own ^ p.mask
+    popcount = Position.popcount
+    score = CENTER_WEIGHT * (popcount(own & CENTER_MASK) - popcount(opp & CENTER_MASK))
+    for w in WINDOWS:
+        if own & w:
+            if not opp & w:
+                score += _OWN_WEIGHTS[popcount(own & w)]
+        elif opp & w:
+            score += _OPP_WEIGHTS[popcount(opp & w)]
+    return score
+
+
+class HeuristicSearch:
+    """
+    Depth-limited alpha-beta (negamax) with the window evaluation above, used
+    when the exact Solver cannot answer in time. Cheap to create: use one
+    instance per thread (analyze() records last_depth / last_nodes).
+    """
+
+    INVALID_MOVE = -10 * WIN_SCORE
+
+    def __init__(self, max_depth: int = 6):
+        self.max_depth = max_depth
+        self.last_depth = -1
+        self.last_nodes = 0
+        self.column_order = [Position.WIDTH // 2 + (1 - 2 * (i % 2)) * (i + 1) // 2 for i in range(Position.WIDTH)]
+
+    def negamax(self, p: Position, depth: int, alpha: int, beta: int, ctx: dict) -> int:
+        ctx["nodes"] += 1
+        if ctx["deadline"] is not None and ctx["nodes"] % 256 == 0 and time.perf_counter() >= ctx["deadline"]:
+            raise HeuristicTimeout()
+
+        if p.nb_moves() >= Position.WIDTH * Position.HEIGHT:
+            return 0
+        if p.can_win_next(): # Thắng sớm được ưu tiên
+            return WIN_SCORE + (Position.WIDTH * Position.HEIGHT - p.nb_moves())
+        possible = p.possible_non_losing_moves()
+        if possible == 0: # Mọi nước đều để đối thủ thắng ngay
+            return -(WIN_SCORE + (Position.WIDTH * Position.HEIGHT - p.nb_moves() - 1))
+        if depth == 0:
+            return evaluate(p)
+
+        for col in self.column_order:
+            move = possible & Position.column_mask(col)
+            if not move:
+                continue
+            p2 = p.copy()
+            p2.play(move)
+            score = -self.negamax(p2, depth - 1, -beta, -alpha, ctx)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def analyze(self, p: Position, max_seconds: Optional[float] = None) -> List[int]:
+        """
+        Scores every column (INVALID_MOVE for full columns) by iterative
+        deepening up to max_depth; when `max_seconds` runs out the scores of
+        the deepest completed iteration are returned (depth 0, the static
+        evaluation of each move, always finishes).
+        """
+        deadline = time.perf_counter() + max_seconds if max_seconds is not None else None
+        ctx = {"nodes": 0, "deadline": None}
+        scores = self._analyze_depth(p, 0, ctx) # Độ sâu 0: chỉ đánh giá tĩnh, không bị ngắt
+        self.last_depth = 0
+        ctx["deadline"] = deadline
+        for depth in range(1, self.max_depth + 1):
+            try:
+                scores = self._analyze_depth(p, depth, ctx)
+            except HeuristicTimeout:
+                break
+            self.last_depth = depth
+        self.last_nodes = ctx["nodes"]
+        return scores
+
+    def _analyze_depth(self, p: Position, depth: int, ctx: dict) -> List[int]:
+        scores = [HeuristicSearch.INVALID_MOVE] * Position.WIDTH
+        # alpha = điểm tốt nhất - 1: cột ngang điểm tốt nhất vẫn có điểm chính xác (để chọn ngẫu nhiên
+        # giữa các nước bằng nhau), cột kém hơn chỉ cần một cận trên
+        alpha = -10 * WIN_SCORE + 1
+        for col in self.column_order:
+            if not p.can_play(col):
+                continue
+            if p.is_winning_move(col):
+                scores[col] = WIN_SCORE + (Position.WIDTH * Position.HEIGHT + 1 - p.nb_moves())
+            else:
+                p2 = p.copy()
+                p2.play_col(col)
+                scores[col] = -self.negamax(p2, depth, -(10 * WIN_SCORE - 1), -alpha, ctx)
+            alpha = max(alpha, scores[col] - 1)
+        return scores
+
+
+if __name__ == "__main__":
+    # Ví dụ: python heuristic.py 4453 [depth]
+    seq = sys.argv[1] if len(sys.argv) > 1 else ""
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    pos = Position()
+    for ch in seq:
+        pos.play_col(int(ch) - 1)
+    search = HeuristicSearch(max_depth=depth)
+    t0 = time.perf_counter()
+    result = search.analyze(pos, max_seconds=5.0)
+    print(pos)
+    print(f"Scores: {result}")
+    print(f"Depth {search.last_depth}, {search.last_nodes} nodes, {(time.perf_counter() - t0) * 1000:.1f} ms")
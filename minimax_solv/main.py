@@ -3,6 +3,9 @@ import sys
 import argparse
 import os 
 import time 
+import multiprocessing
+from contextlib import nullcontext
+from typing import Optional
 
 
 try:
@@ -13,6 +16,7 @@ try:
 
     from position import Position
     from solver import Solver
+    from codec import RecordWriter, read_numbered_records
 except ImportError as e:
      print(f"Error importing required modules: {e}", file=sys.stderr)
      print("Ensure position.py and solver.py are in the same directory or Python path.", file=sys.stderr)
@@ -39,11 +43,39 @@ def run_solver():
     parser.add_argument('-b', '--book', type=str, default=default_book,
                         help=f'Specify path to opening book file (default: {default_book})')
 
-    args = parser.parse_args() # Parses sys.argv
+    parser.add_argument('--driver', choices=Solver.DRIVERS, default='bisection',
+                        help='Null-window driver used by solve(): bisection of the score range or MTD(f)')
+    parser.add_argument('--etc', action='store_true',
+                        help='Enable enhanced transposition cutoffs (probe the TT for every child before searching)')
+
+    parser.add_argument('-m', '--memory', type=str, default=os.environ.get('TT_MEMORY'),
+                        help='Memory budget for the transposition table: bytes, 512M, 2G or auto '
+                             '(env TT_MEMORY; default: fixed 2^24-entry table)')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('TT_WORKERS', '1')),
+                        help='Number of solver processes sharing the memory budget (env TT_WORKERS)')
+
+    parser.add_argument('--binary', action='store_true',
+                        help='Write binary "scored" records (codec.py) to stdout instead of text lines '
+                             '(solve mode only); stdin is always accepted as text or binary')
+
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Solve lines in N worker processes, each with its own warm Solver')
+    parser.add_argument('--unordered', action='store_true',
+                        help='With --jobs: print results as they finish, prefixed with the input line number')
+    parser.add_argument('--chunksize', type=int, default=1,
+                        help='With --jobs: lines sent to a worker at a time')
+
+    parser.add_argument('--profile', nargs='?', const='profile', default=None, metavar='PREFIX',
+                        help='Profile the run: writes PREFIX.stats (cProfile), PREFIX.txt (summary and '
+                             'hot-path call counts) and PREFIX.collapsed (flame graph stacks)')
 
-    weak_mode = args.weak
-    analyze_mode = args.analyze
-    book_filename = args.book
+    args = parser.parse_args() # Parses sys.argv
+    if args.binary and args.analyze:
+        parser.error("--binary cannot be combined with --analyze")
+    if args.jobs < 1 or args.chunksize < 1:
+        parser.error("--jobs and --chunksize must be >= 1")
+    if args.profile and args.jobs > 1:
+        parser.error("--profile profiles a single process, run it without --jobs")
 
     # --- Initialize Solver and Load Book ---
     # Check if Solver class was imported successfully
@@ -52,60 +84,117 @@ def run_solver():
          sys.exit(1)
 
     try:
-        solver = Solver()
+        solver = make_solver(args) if args.jobs <= 1 else None
     except Exception as e:
         print(f"Error initializing Solver: {e}", file=sys.stderr)
         sys.exit(1)
 
-    solver.load_book(book_filename)
-
     # --- Process Input Lines ---
     print("Connect4 Solver ready. Reading positions from stdin...", file=sys.stderr)
-    line_count = 0
-    total_time_us = 0
-
-    for line_num, line in enumerate(sys.stdin, 1):
-        line_count += 1
-        line = line.strip()
-        if not line: # Skip empty lines if any
+    writer = RecordWriter(sys.stdout.buffer, "scored") if args.binary else None
+    totals = {"lines": 0, "nodes": 0, "us": 0, "passes": 0, "etc_probes": 0, "etc_cutoffs": 0}
+
+    if solver is not None:
+        with solver.profile(args.profile) if args.profile else nullcontext():
+            for job in read_jobs(totals):
+                emit(args, writer, totals, job, solve_job(solver, args, job))
+    else:
+        # --jobs N: N process, mỗi process một Solver đã nạp book (và TT riêng, giữ qua các dòng)
+        with multiprocessing.Pool(args.jobs, initializer=_init_worker, initargs=(args,)) as pool:
+            results = (pool.imap_unordered if args.unordered else pool.imap)(_worker_job, read_jobs(totals),
+                                                                            chunksize=args.chunksize)
+            for job, result in results:
+                emit(args, writer, totals, job, result)
+
+    if writer is not None:
+        writer.flush()
+    print(f"\nFinished processing {totals['lines']} lines from stdin "
+          f"({totals['nodes']} nodes, {totals['us'] / 1e6:.3f}s of solver time).", file=sys.stderr)
+    print(f"Null-window passes ({args.driver}): {totals['passes']}", file=sys.stderr)
+    if args.etc:
+        print(f"ETC: {totals['etc_probes']} extra TT probes, {totals['etc_cutoffs']} subtrees cut", file=sys.stderr)
+
+
+def make_solver(args) -> 'Solver':
+    """Solver configured from the command line, with the opening book loaded."""
+    solver = Solver(driver=args.driver, use_etc=args.etc,
+                    memory_budget=args.memory, workers=max(args.workers, args.jobs))
+    solver.load_book(args.book)
+    return solver
+
+
+def read_jobs(totals: dict):
+    """
+    Yields (line_num, label, current_position, mask) for every valid input
+    entry (plain ints, cheap to send to worker processes); invalid ones are
+    reported on stderr.
+    """
+    # stdin: chuỗi nước đi hoặc bản ghi nhị phân (codec.py), nhận dạng theo magic
+    for line_num, (line, p, _) in read_numbered_records():
+        totals["lines"] += 1
+        if p is None:
+            print(f"Line {line_num}: Invalid move sequence '{line}'", file=sys.stderr)
             continue
+        yield line_num, line, p.current_position, p.mask
 
-        p = Position()
-        moves_played = p.play_seq(line)
-
-        if moves_played != len(line):
-            print(f"Line {line_num}: Invalid move sequence '{line}' (failed at move {moves_played + 1})", file=sys.stderr)
-        else:
-            solver.reset_node_count() # Reset count for each valid position
-            start_time = time.perf_counter()
-
-            print(line, end="")
-
-            if analyze_mode:
-                try:
-                    scores = solver.analyze(p, weak_mode)
-                    # Print scores separated by spaces
-                    for score in scores:
-                        print(f" {score}", end="")
-                except Exception as e:
-                    print(f"\nError during analysis on line {line_num}: {e}", file=sys.stderr)
-                    print(" ANALYSIS_ERROR", end="") # Indicate error in output
-
-            else: # Normal solve mode
-                 try:
-                    score = solver.solve(p, weak_mode)
-                    print(f" {score}", end="")
-                 except Exception as e:
-                    print(f"\nError during solve on line {line_num}: {e}", file=sys.stderr)
-                    print(" SOLVE_ERROR", end="") # Indicate error in output
-
-
-            end_time = time.perf_counter()
-            time_us = (end_time - start_time) * 1_000_000
-            total_time_us += time_us
-            print()
-
-    print(f"\nFinished processing {line_count} lines from stdin.", file=sys.stderr)
+
+def solve_job(solver: 'Solver', args, job):
+    """
+    Solves (or analyzes) one job. Returns (scores, nodes, microseconds,
+    error, (null-window passes, ETC probes, ETC cutoffs)); scores is None on error.
+    """
+    _, _, current_position, mask = job
+    p = Position.from_bitboards(current_position, mask)
+    before = (solver.null_window_passes, solver.etc_probes, solver.etc_cutoffs)
+    solver.reset_node_count() # Reset count for each valid position
+    start_time = time.perf_counter()
+    try:
+        scores = solver.analyze(p, args.weak) if args.analyze else [solver.solve(p, args.weak)]
+        error = None
+    except Exception as e:
+        scores, error = None, str(e)
+    time_us = int((time.perf_counter() - start_time) * 1_000_000)
+    after = (solver.null_window_passes, solver.etc_probes, solver.etc_cutoffs)
+    return scores, solver.get_node_count(), time_us, error, tuple(a - b for a, b in zip(after, before))
+
+
+def emit(args, writer, totals: dict, job, result):
+    """
+    Writes one result like main.cpp: "<moves> <score(s)> <nodes> <microseconds>",
+    prefixed with the input line number in --unordered mode; or a binary record.
+    """
+    line_num, line, current_position, mask = job
+    scores, nodes, time_us, error, (passes, etc_probes, etc_cutoffs) = result
+    totals["nodes"] += nodes
+    totals["us"] += time_us
+    totals["passes"] += passes
+    totals["etc_probes"] += etc_probes
+    totals["etc_cutoffs"] += etc_cutoffs
+    if error is not None:
+        mode = "analysis" if args.analyze else "solve"
+        print(f"Error during {mode} on line {line_num}: {error}", file=sys.stderr)
+    if writer is not None:
+        if error is None:
+            writer.write(Position.from_bitboards(current_position, mask), scores[0])
+        return
+    prefix = f"{line_num} " if args.unordered else ""
+    if error is not None:
+        print(f"{prefix}{line} {'ANALYSIS_ERROR' if args.analyze else 'SOLVE_ERROR'}") # Indicate error in output
+    else:
+        print(f"{prefix}{line} {' '.join(map(str, scores))} {nodes} {time_us}")
+
+
+# --- Worker process của --jobs ---
+_worker_solver: Optional['Solver'] = None
+_worker_args = None
+
+def _init_worker(args):
+    global _worker_solver, _worker_args
+    _worker_args = args
+    _worker_solver = make_solver(args)
+
+def _worker_job(job):
+    return job, solve_job(_worker_solver, _worker_args, job)
 
 
 if __name__ == "__main__":
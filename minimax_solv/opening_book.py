@@ -9,10 +9,12 @@ from typing import Optional, Tuple
 try:
     from .position import Position
     from .transposition_table import TranspositionTable
+    from .shared_table import MappedTable
 except ImportError:
     # Fallback for running standalone (if files are in the same directory)
     from position import Position
     from transposition_table import TranspositionTable
+    from shared_table import MappedTable
 
 
 class OpeningBook:
@@ -37,7 +39,12 @@ class OpeningBook:
         self._log_size: int = -1 # Store the log_size used when loading
         self._partial_key_bytes: int = -1 # Store key bytes used when loading
 
-    def load(self, filename: str) -> bool:
+    def load(self, filename: str, use_mmap: bool = False) -> bool:
+        """
+        Loads a book file. With use_mmap=True the key/value arrays are not
+        copied into Python lists but mapped read-only from the file, so all
+        worker processes on a host share one copy through the page cache.
+        """
         self.depth = -1 # Reset depth in case of failure
         self.T = None   # Reset table
         self._log_size = -1
@@ -79,6 +86,18 @@ class OpeningBook:
                 if not (0 <= log_size <= 40): # Reasonable limit for log_size
                     raise ValueError(f"Invalid log2(size) (found: {log_size})")
 
+                if use_mmap:
+                    try:
+                        self.T = MappedTable(filename, header_size, TranspositionTable.prime_size(log_size),
+                                             partial_key_bytes)
+                    except (ValueError, OSError) as e:
+                        raise IOError(f"Cannot map book: {e}")
+                    self.depth = file_depth
+                    self._log_size = log_size
+                    self._partial_key_bytes = partial_key_bytes
+                    print("done (mapped)", file=sys.stderr)
+                    return True
+
                 # --- Initialize Transposition Table ---
                 partial_key_bits = partial_key_bytes * 8
                 try:
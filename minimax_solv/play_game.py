@@ -13,6 +13,7 @@ try:
               sys.path.insert(0, script_dir)
     from position import Position
     from solver import Solver
+    from profiling import profiler_from_args
 except ImportError as e:
      print(f"Error importing required modules: {e}", file=sys.stderr)
      print("Ensure position.py and solver.py are in the same directory or Python path.", file=sys.stderr)
@@ -130,12 +131,14 @@ def check_game_over(p: Position, last_player_num: int) -> Optional[str]:
 
 
 # --- Sửa đổi hàm play_game ---
-def play_game(human_starts: bool = True): # Thêm tham số human_starts, mặc định là True
+def play_game(human_starts: bool = True, profile_prefix: Optional[str] = None): # Thêm tham số human_starts, mặc định là True
     """
     Chạy game Connect 4 1v1.
 
     Args:
         human_starts: True nếu người chơi đi trước, False nếu AI đi trước.
+        profile_prefix: nếu có, chỉ profile các nước đi của AI (không tính thời gian chờ người chơi)
+            và ghi kết quả khi ván kết thúc (profiling.py).
     """
     print("Welcome to Connect 4!")
     if human_starts:
@@ -158,6 +161,8 @@ def play_game(human_starts: bool = True): # Thêm tham số human_starts, mặc
     else:
          print(f"Warning: Opening book '{book_filename}' not found.", file=sys.stderr)
 
+    profiler = profiler_from_args(profile_prefix, solver)
+
     # --- Game Setup ---
     # Gán vai trò nhất quán, chỉ thay đổi người bắt đầu
     human_player_num = 1 # Người luôn là Player 1 trong thông báo lượt đi
@@ -184,7 +189,11 @@ def play_game(human_starts: bool = True): # Thêm tham số human_starts, mặc
             last_player_num = human_player_num # Người vừa đi
         else: # AI's turn
             print(">>> Player 2's turn (AI) <<<")
-            col_index = get_ai_move(solver, p)
+            if profiler is not None:
+                with profiler.active():
+                    col_index = get_ai_move(solver, p)
+            else:
+                col_index = get_ai_move(solver, p)
             if col_index == -1:
                  print("AI Error: Could not determine a move.", file=sys.stderr)
                  result = "Game Error"
@@ -213,13 +222,17 @@ def play_game(human_starts: bool = True): # Thêm tham số human_starts, mặc
     display_board(p)
     print(f"Result: {result}")
     print("*"*30 + "\n")
+    if profiler is not None:
+        profiler.write()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Play Connect 4 against an AI.")
     parser.add_argument('--ai-first', action='store_true', # Thêm tùy chọn --ai-first
                         help='Let the AI make the first move.')
+    parser.add_argument('--profile', nargs='?', const='profile', default=None, metavar='PREFIX',
+                        help='Profile the AI moves: writes PREFIX.stats, PREFIX.txt and PREFIX.collapsed')
 
     args = parser.parse_args() 
 
-    play_game(human_starts=(not args.ai_first))
\ No newline at end of file
+    play_game(human_starts=(not args.ai_first), profile_prefix=args.profile)
\ No newline at end of file
@@ -14,6 +14,11 @@ class Position:
     for col in range(WIDTH): _bottom_mask |= 1 << (col * (HEIGHT + 1))
     BOTTOM_MASK = _bottom_mask
     BOARD_MASK = BOTTOM_MASK * ((1 << HEIGHT) - 1)
+    # Hàng lẻ / chẵn tính từ 1 ở đáy (hàng lẻ = bit index chẵn trong cột)
+    _odd_rows = 0
+    for row in range(0, HEIGHT, 2): _odd_rows |= BOTTOM_MASK << row
+    ODD_ROWS_MASK = _odd_rows
+    EVEN_ROWS_MASK = BOARD_MASK ^ ODD_ROWS_MASK
 
     @staticmethod
     def top_mask_col(col: int) -> int: return 1 << ((Position.HEIGHT - 1) + col * (Position.HEIGHT + 1))
@@ -40,9 +45,48 @@ class Position:
     def compute_winning_position(position: int, mask: int) -> int:
         r=(position<<1)&(position<<2)&(position<<3);h_shift=Position.HEIGHT+1;p=(position<<h_shift)&(position<<2*h_shift);r|=p&(position<<3*h_shift);r|=p&(position>>h_shift);p=(position>>h_shift)&(position>>2*h_shift);r|=p&(position<<h_shift);r|=p&(position>>3*h_shift);d1_shift=Position.HEIGHT;p=(position<<d1_shift)&(position<<2*d1_shift);r|=p&(position<<3*d1_shift);r|=p&(position>>d1_shift);p=(position>>d1_shift)&(position>>2*d1_shift);r|=p&(position<<d1_shift);r|=p&(position>>3*d1_shift);d2_shift=Position.HEIGHT+2;p=(position<<d2_shift)&(position<<2*d2_shift);r|=p&(position<<3*d2_shift);r|=p&(position>>d2_shift);p=(position>>d2_shift)&(position>>2*d2_shift);r|=p&(position<<d2_shift);r|=p&(position>>3*d2_shift);return r&(Position.BOARD_MASK^mask)
 
+    @staticmethod
+    def has_alignment(position: int) -> bool:
+        """True if the stones in `position` contain 4 in a row in any direction."""
+        for shift in (1, Position.HEIGHT + 1, Position.HEIGHT, Position.HEIGHT + 2):
+            m = position & (position >> shift)
+            if m & (m >> 2 * shift): return True
+        return False
+
     def __init__(self):
         self.current_position: int = 0; self.mask: int = 0; self.moves: int = 0
 
+    @staticmethod
+    def from_board(board: List[List[int]], current_player: int) -> 'Position':
+        """
+        Builds a Position from an API board (board[0] is the TOP row, cells are
+        0 / 1 / 2) with `current_player` (1 or 2) to move. -1 (a blocked cell)
+        belongs to neither player but is occupied: its mask bit is set, so the
+        stones above it stay consistent with the column height.
+        """
+        if not (1 <= current_player <= 2):
+            raise ValueError(f"Invalid current_player value: {current_player}")
+        if len(board) != Position.HEIGHT or any(len(row) != Position.WIDTH for row in board):
+            raise ValueError(f"Invalid board dimensions: {len(board)}x{len(board[0]) if board else 'N/A'}")
+        pos = Position(); player_masks = [0, 0, 0]
+        for r_api in range(Position.HEIGHT):
+            r_internal = Position.HEIGHT - 1 - r_api # API hàng 0 = trên cùng, bitboard hàng 0 = dưới cùng
+            for c in range(Position.WIDTH):
+                player_num = board[r_api][c]
+                if player_num == 0: continue
+                if player_num not in (1, 2, -1): raise ValueError(f"Invalid cell value {player_num} at ({r_api},{c})")
+                cell_mask = 1 << (r_internal + c * (Position.HEIGHT + 1))
+                pos.mask |= cell_mask; pos.moves += 1
+                if player_num != -1: player_masks[player_num] |= cell_mask
+        pos.current_position = player_masks[current_player]
+        return pos
+
+    @staticmethod
+    def from_bitboards(current_position: int, mask: int) -> 'Position':
+        """Builds a Position from its (current_position, mask) pair, e.g. a binary record (codec.py)."""
+        pos = Position(); pos.current_position = current_position; pos.mask = mask; pos.moves = Position.popcount(mask)
+        return pos
+
     def copy(self):
         new_pos = Position(); new_pos.current_position = self.current_position; new_pos.mask = self.mask; new_pos.moves = self.moves; return new_pos
 
@@ -56,7 +100,8 @@ class Position:
     def play_seq(self, seq: str) -> int:
         processed_moves = 0
         for char in seq:
-            if not char.isdigit(): return processed_moves; col = int(char) - 1
+            if not char.isdigit(): return processed_moves
+            col = int(char) - 1
             if not (0 <= col < Position.WIDTH): return processed_moves
             if not self.can_play(col): return processed_moves
             if self.is_winning_move(col): return processed_moves
@@ -73,6 +118,53 @@ class Position:
         opponent_position = self.current_position ^ self.mask
         return self.compute_winning_position(opponent_position, self.mask)
 
+    # --- Phân tích threat lẻ / chẵn (odd / even threats) ---
+    def odd_threats(self, opponent: bool = False) -> int:
+        """Empty cells on odd rows (1-based) that would complete 4 in a row for the player to move (or the opponent)."""
+        threats = self.opponent_winning_position() if opponent else self.winning_position()
+        return threats & Position.ODD_ROWS_MASK
+    def even_threats(self, opponent: bool = False) -> int:
+        """Same as odd_threats() for the empty cells on even rows."""
+        threats = self.opponent_winning_position() if opponent else self.winning_position()
+        return threats & Position.EVEN_ROWS_MASK
+    def all_columns_even(self) -> bool:
+        """Every column has an even number of empty cells (the next free cell of each column is on an odd row)."""
+        return (self.possible() & Position.EVEN_ROWS_MASK) == 0
+
+    def claimeven_bound(self) -> Optional[int]:
+        """
+        Zugzwang (claimeven) upper bound on the score of the player to move.
+        When every column has an even number of empty cells, the opponent can
+        always answer directly above our move: we get every empty odd-row cell,
+        the opponent every empty even-row cell, whatever the move order. If we
+        cannot make 4 in a row with those cells we cannot win (bound 0), and
+        if the opponent can, the opponent wins (bound -1). An odd threat of
+        ours (an even threat of the opponent) is such a 4 in a row through a
+        single claimed cell, so it decides the case without the full check.
+        Returns None when the column parity does not allow the argument.
+        """
+        if not self.all_columns_even(): return None
+        if self.odd_threats(): return None
+        empty = Position.BOARD_MASK ^ self.mask
+        if Position.has_alignment(self.current_position | (empty & Position.ODD_ROWS_MASK)): return None
+        if self.even_threats(opponent=True): return -1
+        opponent_position = self.current_position ^ self.mask
+        if Position.has_alignment(opponent_position | (empty & Position.EVEN_ROWS_MASK)): return -1
+        return 0
+
+    def claimeven_lower_bound(self) -> Optional[int]:
+        """
+        Lower bound on the score of the player to move when exactly one column
+        has an odd number of empty cells: playing there leaves the opponent in
+        the claimeven situation above, with us as the player answering on top.
+        Returns None when that does not apply or proves nothing.
+        """
+        odd_column_move = self.possible() & Position.EVEN_ROWS_MASK
+        if odd_column_move == 0 or odd_column_move & (odd_column_move - 1): return None
+        p2 = self.copy(); p2.play(odd_column_move)
+        bound = p2.claimeven_bound()
+        return None if bound is None else -bound
+
     def possible(self) -> int: return (self.mask + Position.BOTTOM_MASK) & Position.BOARD_MASK
     def can_win_next(self) -> bool: return bool(self.winning_position() & self.possible())
     def possible_non_losing_moves(self) -> int:
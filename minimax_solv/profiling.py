@@ -0,0 +1,166 @@
+"""
+Profiling switch for the solver tools (main.py / score.py / play_game.py
+--profile, Solver.profile()). One session collects:
+
+- cProfile data, written as <prefix>.stats (pstats / snakeviz format, like the checked-in profile.stats)
+- call counts of the hot path (_hot_path()), read from the cProfile data: no wrapper is installed,
+  so every function keeps its own entry and pays no extra call
+- stack samples taken every `sample_interval` seconds of CPU time (SIGPROF), written as
+  <prefix>.collapsed in the "frame;frame;frame count" format read by flamegraph.pl / speedscope
+
+plus a readable summary in <prefix>.txt.
+"""
+import cProfile
+import io
+import os
+import pstats
+import signal
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Optional
+
+try:
+    from .position import Position
+    from .transposition_table import TranspositionTable
+except ImportError:
+    from position import Position
+    from transposition_table import TranspositionTable
+
+DEFAULT_PREFIX = "profile"
+SAMPLE_INTERVAL = 0.001 # Giây CPU giữa hai mẫu stack
+SUMMARY_LINES = 30
+
+
+def _hot_path(table_class) -> list:
+    """(label, owner class, attribute) of the functions counted by SolverProfiler."""
+    try:
+        from .solver import Solver
+    except ImportError:
+        from solver import Solver
+    return [
+        ("negamax", Solver, "negamax"),
+        ("endgame", Solver, "endgame"),
+        ("possible_non_losing_moves", Position, "possible_non_losing_moves"),
+        ("move_score", Position, "move_score"),
+        ("key3", Position, "key3"),
+        (f"{table_class.__name__}.get", table_class, "get"),
+    ]
+
+
+class SolverProfiler:
+    """
+    A profiling session that can be switched on and off several times (for
+    example only around the AI moves of a game) and written once at the end.
+    Call counts cover every Solver in the process while the session is active.
+    """
+
+    def __init__(self, prefix: str = DEFAULT_PREFIX, sample_interval: float = SAMPLE_INTERVAL,
+                 table_class=TranspositionTable):
+        self.prefix = prefix
+        self.sample_interval = sample_interval
+        self.table_class = table_class
+        self.stacks: Counter = Counter()
+        self._profile = cProfile.Profile()
+        self._previous_handler = None
+        self._sampling = False
+
+    # --- Bật / tắt ---
+
+    def start(self):
+        self._start_sampling()
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        self._stop_sampling()
+
+    @contextmanager
+    def active(self):
+        """Profiles the body of the with-block (sessions accumulate across blocks)."""
+        self.start()
+        try:
+            yield self
+        finally:
+            self.stop()
+
+    def _start_sampling(self):
+        # SIGPROF chỉ đặt được từ main thread (và không có trên Windows)
+        if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+            return
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.sample_interval, self.sample_interval)
+        self._sampling = True
+
+    def _stop_sampling(self):
+        if not self._sampling:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        self._sampling = False
+
+    def _sample(self, signum, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            frame = frame.f_back
+            if code.co_filename == __file__: # Bỏ qua frame của chính trình xử lý tín hiệu này
+                continue
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        self.stacks[";".join(reversed(names))] += 1
+
+    # --- Kết quả ---
+
+    def call_counts(self) -> Counter:
+        """Calls of each hot-path function (recursive calls included), from the cProfile data."""
+        counts = Counter()
+        try:
+            stats = pstats.Stats(self._profile).stats
+        except TypeError: # Chưa có dữ liệu nào (session chưa từng bật)
+            return counts
+        for label, owner, name in _hot_path(self.table_class):
+            code = getattr(owner.__dict__[name], "__func__", owner.__dict__[name]).__code__
+            entry = stats.get((code.co_filename, code.co_firstlineno, code.co_name))
+            counts[label] = entry[1] if entry else 0 # (primitive calls, total calls, tottime, cumtime, callers)
+        return counts
+
+    def summary(self, lines: int = SUMMARY_LINES) -> str:
+        out = io.StringIO()
+        out.write("Hot-path call counts:\n")
+        counts = self.call_counts()
+        for label, _, _ in _hot_path(self.table_class):
+            out.write(f"  {label:<28} {counts[label]:>14}\n")
+        out.write(f"Stack samples: {sum(self.stacks.values())} (every {self.sample_interval * 1000:g} ms CPU)\n\n")
+        try:
+            stats = pstats.Stats(self._profile, stream=out)
+        except TypeError: # Chưa có dữ liệu nào (session chưa từng bật)
+            return out.getvalue()
+        stats.sort_stats("cumulative").print_stats(lines)
+        return out.getvalue()
+
+    def write(self) -> List[str]:
+        """Writes <prefix>.stats, <prefix>.txt and <prefix>.collapsed; returns the file names."""
+        files = [f"{self.prefix}.stats", f"{self.prefix}.txt", f"{self.prefix}.collapsed"]
+        self._profile.dump_stats(files[0])
+        with open(files[1], "w") as f:
+            f.write(self.summary())
+        with open(files[2], "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"Profile written to {', '.join(files)}", file=sys.stderr)
+        return files
+
+
+def profiler_from_args(prefix: Optional[str], solver=None) -> Optional[SolverProfiler]:
+    """SolverProfiler for a --profile option (None when profiling is off)."""
+    if prefix is None:
+        return None
+    table_class = type(solver.trans_table) if solver is not None and solver.trans_table is not None else TranspositionTable
+    return SolverProfiler(prefix, table_class=table_class)
+
+
+if __name__ == "__main__":
+    # In tóm tắt của một file .stats đã ghi: python profiling.py [profile.stats] [số dòng]
+    filename = sys.argv[1] if len(sys.argv) > 1 else f"{DEFAULT_PREFIX}.stats"
+    pstats.Stats(filename).sort_stats("cumulative").print_stats(int(sys.argv[2]) if len(sys.argv) > 2 else SUMMARY_LINES)
@@ -0,0 +1,168 @@
+import sys
+import os
+import json
+import math
+import time
+import argparse
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+try:
+    if '.' not in sys.path:
+         script_dir = os.path.dirname(__file__)
+         if script_dir:
+              sys.path.insert(0, script_dir)
+    from position import Position
+    from solver import Solver
+    from request_log import read_log
+except ImportError as e:
+     print(f"Error importing required modules: {e}", file=sys.stderr)
+     sys.exit(1)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return float('nan')
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def http_sender(url: str, timeout: float) -> Callable[[dict], Optional[int]]:
+    """Returns a function that POSTs one payload to a running server and returns the move."""
+    endpoint = url.rstrip("/") + "/api/connect4-move"
+
+    def send(payload: dict) -> Optional[int]:
+        data = json.dumps(payload).encode("utf-8")
+        req = urllib.request.Request(endpoint, data=data, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read()).get("move")
+    return send
+
+
+def direct_sender(book: Optional[str]) -> Callable[[dict], Optional[int]]:
+    """
+    Returns a function that solves one payload in-process with a shared Solver
+    (serialised by a lock, like the server does), bypassing HTTP.
+    """
+    solver = Solver()
+    if book:
+        solver.load_book(book)
+    lock = threading.Lock()
+
+    def send(payload: dict) -> Optional[int]:
+        pos = Position.from_board(payload["board"], payload["current_player"])
+        with lock:
+            scores = solver.analyze(pos, weak=False)
+        valid = [c for c in payload["valid_moves"] if 0 <= c < Position.WIDTH and scores[c] != Solver.INVALID_MOVE]
+        return max(valid, key=lambda c: scores[c]) if valid else None
+    return send
+
+
+def replay(entries: List[dict], send: Callable[[dict], Optional[int]], rate: float, concurrency: int) -> dict:
+    """
+    Replays `entries` through `send`. With rate > 0 requests are issued on an
+    open-loop schedule (request i starts at i / rate seconds); with rate == 0
+    they are sent back to back by `concurrency` workers.
+    """
+    latencies: List[float] = []
+    errors = 0
+    mismatches = 0
+    results_lock = threading.Lock()
+    start = time.perf_counter()
+
+    def run(index: int, entry: dict):
+        nonlocal errors, mismatches
+        t0 = time.perf_counter()
+        if rate > 0:
+            # Open loop: latency counts from the scheduled start, so time spent
+            # waiting for a free worker (a saturated pool) is included
+            t0 = start + index / rate
+            delay = t0 - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        try:
+            move = send(entry["payload"])
+        except Exception as e: # URLError, OSError, ValueError... and anything unexpected
+            with results_lock:
+                errors += 1
+            print(f"Request {index}: {type(e).__name__}: {e}", file=sys.stderr)
+            return
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        with results_lock:
+            latencies.append(elapsed_ms)
+            if entry["move"] is not None and move != entry["move"]:
+                mismatches += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(run, i, entry) for i, entry in enumerate(entries)]
+    for future in futures:
+        future.result() # Re-raises a bug in run() itself instead of dropping the request silently
+
+    wall = time.perf_counter() - start
+    latencies.sort()
+    recorded = sorted(e["latency_ms"] for e in entries if e["latency_ms"] is not None)
+    return {
+        "requests": len(entries),
+        "ok": len(latencies),
+        "errors": errors,
+        "move_mismatches": mismatches,
+        "wall_s": wall,
+        "throughput_rps": len(latencies) / wall if wall > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else float('nan'),
+        "recorded_p50_ms": percentile(recorded, 50),
+        "recorded_p95_ms": percentile(recorded, 95),
+        "recorded_p99_ms": percentile(recorded, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Replay a recorded request log (REQUEST_LOG) against a server or the solver.',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+        )
+    parser.add_argument('log', help='Request log written by app.py with REQUEST_LOG set')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', default='http://127.0.0.1:8080', help='Base URL of a running server')
+    target.add_argument('--direct', action='store_true', help='Call the Python solver in-process instead of HTTP')
+    parser.add_argument('-b', '--book', type=str, default=None, help='Opening book for --direct mode')
+    parser.add_argument('-r', '--rate', type=float, default=0.0,
+                        help='Requests per second (0 = as fast as the workers allow)')
+    parser.add_argument('-c', '--concurrency', type=int, default=1, help='Concurrent requests in flight')
+    parser.add_argument('-n', '--limit', type=int, default=0, help='Replay only the first N entries (0 = all)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='HTTP timeout per request (seconds)')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    entries = list(read_log(args.log))
+    if args.limit > 0:
+        entries = entries[:args.limit]
+    if not entries:
+        print(f"No entries in '{args.log}'.", file=sys.stderr)
+        sys.exit(1)
+
+    send = direct_sender(args.book) if args.direct else http_sender(args.url, args.timeout)
+    target_name = "solver (in-process)" if args.direct else args.url
+    print(f"Replaying {len(entries)} requests against {target_name} "
+          f"(rate={args.rate or 'max'}, concurrency={args.concurrency})...", file=sys.stderr)
+
+    report = replay(entries, send, args.rate, max(1, args.concurrency))
+    if args.json:
+        print(json.dumps(report))
+        return
+    print(f"requests   {report['ok']}/{report['requests']} ok, {report['errors']} errors, "
+          f"{report['move_mismatches']} moves differ from the log (ties may be broken at random)")
+    print(f"throughput {report['throughput_rps']:.2f} req/s over {report['wall_s']:.2f} s")
+    print(f"latency    p50 {report['p50_ms']:.2f} ms | p95 {report['p95_ms']:.2f} ms | "
+          f"p99 {report['p99_ms']:.2f} ms | max {report['max_ms']:.2f} ms")
+    print(f"recorded   p50 {report['recorded_p50_ms']:.2f} ms | p95 {report['recorded_p95_ms']:.2f} ms | "
+          f"p99 {report['recorded_p99_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
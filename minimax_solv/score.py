@@ -1,6 +1,19 @@
 import sys
+from contextlib import nullcontext
 from position import Position
-from solver import Solver  
+from solver import Solver
+from codec import RecordWriter, read_records
+
+# stdin: chuỗi nước đi (text) hoặc bản ghi nhị phân của codec.py (gen.py <depth> positions|moves)
+# python score.py --binary: ghi bản ghi "scored" 17 byte ra stdout thay cho "seq score"
+binary_output = "--binary" in sys.argv[1:]
+# python score.py --profile [PREFIX]: ghi PREFIX.stats / .txt / .collapsed (profiling.py)
+profile_prefix = None
+if "--profile" in sys.argv[1:]:
+    i = sys.argv.index("--profile")
+    has_prefix = i + 1 < len(sys.argv) and not sys.argv[i + 1].startswith("--")
+    profile_prefix = sys.argv[i + 1] if has_prefix else "profile"
+writer = RecordWriter(sys.stdout.buffer, "scored") if binary_output else None
 
 print("Initializing Solver for scoring...", file=sys.stderr)
 solver_instance = Solver()
@@ -8,21 +21,23 @@ solver_instance = Solver()
 
 print("Reading positions from stdin and scoring...", file=sys.stderr)
 count = 0
-for line in sys.stdin:
-    move_seq = line.strip()
-    if not move_seq: continue
-
-    p = Position()
-    if p.play_seq(move_seq) == len(move_seq):
-        try:
-            score = solver_instance.solve(p, weak=False)
-            print(f"{move_seq} {score}")
-            count += 1
-            if count % 1000 == 0: # In tiến trình
-                 print(f"Scored {count} positions...", file=sys.stderr)
-        except Exception as e:
-            print(f"Error solving sequence '{move_seq}': {e}", file=sys.stderr)
-    else:
-        print(f"Invalid sequence skipped: {move_seq}", file=sys.stderr)
+with solver_instance.profile(profile_prefix) if profile_prefix else nullcontext():
+    for move_seq, p, _ in read_records():
+        if p is not None:
+            try:
+                score = solver_instance.solve(p, weak=False)
+                if writer is not None:
+                    writer.write(p, score)
+                else:
+                    print(f"{move_seq} {score}")
+                count += 1
+                if count % 1000 == 0: # In tiến trình
+                     print(f"Scored {count} positions...", file=sys.stderr)
+            except Exception as e:
+                print(f"Error solving sequence '{move_seq}': {e}", file=sys.stderr)
+        else:
+            print(f"Invalid sequence skipped: {move_seq}", file=sys.stderr)
 
-print(f"Finished scoring {count} positions.", file=sys.stderr)
\ No newline at end of file
+if writer is not None:
+    writer.flush()
+print(f"Finished scoring {count} positions.", file=sys.stderr)
@@ -0,0 +1,219 @@
+import sys
+import os
+import struct
+import mmap
+import time
+from array import array
+from multiprocessing import shared_memory
+from typing import Optional
+
+try:
+    from .transposition_table import TranspositionTable, read_snapshot, write_snapshot
+except ImportError:
+    from transposition_table import TranspositionTable, read_snapshot, write_snapshot
+
+
+def _open_segment(name: str, size: int = 0, create: bool = False) -> shared_memory.SharedMemory:
+    """
+    Opens a shared memory segment without registering it with the
+    multiprocessing resource tracker: the segment must outlive any single
+    worker (gunicorn restarts them), so it is only removed by unlink().
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    except TypeError: # Python < 3.13: không có tham số track
+        shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+def _unlink_segment(shm: shared_memory.SharedMemory):
+    """Removes a segment opened with _open_segment()."""
+    if not hasattr(shm, "_track"): # Python < 3.13: unlink() cũng unregister với resource tracker
+        from multiprocessing import resource_tracker
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+class SharedTranspositionTable:
+    """
+    Transposition table living in a named shared memory segment, so every
+    worker process on a host can attach to the same table.
+
+    Each slot is one uint64 holding (partial_key << 8) | value, so an entry
+    is written with a single store and readers never see a key paired with
+    another entry's value. Same get/put interface as TranspositionTable.
+
+    The first process creates the segment and writes the header; the others
+    attach, waiting up to _ATTACH_TIMEOUT seconds for the header to appear.
+    The segment outlives the processes: a later run with the same geometry
+    attaches to it and keeps its entries (they only depend on the position,
+    so they stay valid), a different geometry raises ValueError, a segment left
+    without a header by a creator that died is reported after the timeout.
+    Either way `python shared_table.py --unlink <name>` removes it.
+    """
+
+    _MAGIC = b"C4SHTT01"
+    _HEADER = '<8sQB7x' # magic, size, partial_key_bits (+ padding to 24 bytes)
+    _ATTACH_TIMEOUT = 2.0
+
+    def __init__(self, log_size: int, partial_key_bits: int = 32, name: str = "connect4_tt"):
+        if not isinstance(log_size, int) or log_size < 0:
+            raise ValueError("log_size must be a non-negative integer")
+        if not (0 < partial_key_bits <= 56):
+            raise ValueError("partial_key_bits must be in 1..56 for a shared table")
+
+        self.size: int = TranspositionTable.prime_size(log_size)
+        self.partial_key_bits: int = partial_key_bits
+        self.partial_key_mask: int = (1 << partial_key_bits) - 1
+        self.name = name
+        self.created = False
+
+        header_size = struct.calcsize(self._HEADER)
+        total = header_size + 8 * self.size
+        deadline = time.monotonic() + self._ATTACH_TIMEOUT
+        while True:
+            try:
+                self._shm = _open_segment(name, total, create=True)
+                struct.pack_into(self._HEADER, self._shm.buf, 0, self._MAGIC, self.size, partial_key_bits)
+                self.created = True
+                break
+            except FileExistsError:
+                pass
+            # Segment đã tồn tại: người tạo có thể chưa kịp ftruncate / ghi header -> thử lại một lúc
+            try:
+                self._shm = _open_segment(name)
+            except FileNotFoundError: # Đã bị unlink trong lúc đó: tạo lại
+                continue
+            except ValueError: # Kích thước 0: người tạo chưa ftruncate
+                self._shm = None
+            if self._shm is not None and self._shm.size >= header_size:
+                magic, size, key_bits = struct.unpack_from(self._HEADER, self._shm.buf, 0)
+                if magic != bytes(len(self._MAGIC)):
+                    break
+            if self._shm is not None:
+                self._shm.close()
+            if time.monotonic() >= deadline:
+                raise ValueError(f"Shared table '{name}' was never initialised (its creator probably died); "
+                                 f"unlink it with `python shared_table.py --unlink {name}`")
+            time.sleep(0.01)
+        if not self.created:
+            if magic != self._MAGIC or size != self.size or key_bits != partial_key_bits:
+                self._shm.close()
+                raise ValueError(f"Shared table '{name}' has a different geometry "
+                                 f"(size={size}, key_bits={key_bits}); unlink it or use another name")
+        self.slots = self._shm.buf[header_size:header_size + 8 * self.size].cast('Q')
+
+    def reset(self):
+        """Clears the table for every attached process."""
+        block = 1 << 16
+        zeros = array('Q', bytes(8 * block))
+        for start in range(0, self.size, block):
+            end = min(start + block, self.size)
+            self.slots[start:end] = zeros[:end - start]
+
+    def put(self, key: int, value: int):
+        self.slots[key % self.size] = ((key & self.partial_key_mask) << 8) | value
+
+    def get(self, key: int) -> int:
+        entry = self.slots[key % self.size]
+        if entry >> 8 == key & self.partial_key_mask:
+            return entry & 0xFF
+        return 0 # Cache miss (ô trống có value 0)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def fill_ratio(self, samples: int = 4096) -> float:
+        """Estimates the fraction of occupied slots (see TranspositionTable.fill_ratio)."""
+        if self.size <= samples:
+            return sum(1 for e in self.slots if e) / self.size
+        step = self.size // samples
+        return sum(1 for i in range(0, step * samples, step) if self.slots[i]) / samples
+
+    def save_snapshot(self, filename: str) -> int:
+        """Writes occupied slots in the TranspositionTable snapshot format."""
+        indices = [i for i, e in enumerate(self.slots) if e]
+        return write_snapshot(filename, self.size, self.partial_key_bits, indices,
+                              (self.slots[i] >> 8 for i in indices), (self.slots[i] & 0xFF for i in indices))
+
+    def load_snapshot(self, filename: str) -> int:
+        """Restores a snapshot written by either table class (same size and key width)."""
+        indices, keys, values = read_snapshot(filename, self.size, self.partial_key_bits)
+        for i, k, v in zip(indices, keys, values):
+            self.slots[i] = (k << 8) | v
+        return len(indices)
+
+    def close(self):
+        """Detaches this process (the segment stays alive for the other workers)."""
+        self.slots.release()
+        self._shm.close()
+
+    def unlink(self):
+        """Removes the segment from the host once no worker needs it any more."""
+        _unlink_segment(self._shm)
+
+
+class MappedTable:
+    """
+    Read-only view over the key/value arrays of an opening book file, mapped
+    with mmap. Every process that maps the same file shares the same page
+    cache pages, so the book costs its file size once per host.
+    """
+
+    _KEY_CODES = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+    def __init__(self, filename: str, offset: int, size: int, partial_key_bytes: int):
+        if sys.byteorder != 'little':
+            raise ValueError("Mapped book requires a little-endian host")
+        self.size = size
+        self.partial_key_bits = partial_key_bytes * 8
+        self.partial_key_mask = (1 << self.partial_key_bits) - 1
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        key_end = offset + size * partial_key_bytes
+        if len(self._map) < key_end + size:
+            self._map.close()
+            raise ValueError("Book file is truncated")
+        view = memoryview(self._map)
+        self.keys = view[offset:key_end].cast(self._KEY_CODES[partial_key_bytes])
+        self.values = view[key_end:key_end + size]
+
+    def get(self, key: int) -> int:
+        pos = key % self.size
+        if self.keys[pos] == key & self.partial_key_mask:
+            return self.values[pos]
+        return 0
+
+    def put(self, key: int, value: int):
+        raise TypeError("Mapped opening book is read-only")
+
+    def __len__(self) -> int:
+        return self.size
+
+
+if __name__ == "__main__":
+    # Dọn segment dùng chung: python shared_table.py --unlink [name]
+    if len(sys.argv) >= 2 and sys.argv[1] == "--unlink":
+        seg_name = sys.argv[2] if len(sys.argv) > 2 else "connect4_tt"
+        try:
+            shm = _open_segment(seg_name)
+            shm.close()
+            _unlink_segment(shm)
+            print(f"Unlinked shared segment '{seg_name}'.")
+        except FileNotFoundError:
+            print(f"No shared segment named '{seg_name}'.")
+    else:
+        tt = SharedTranspositionTable(log_size=4, partial_key_bits=8, name="connect4_tt_demo")
+        other = SharedTranspositionTable(log_size=4, partial_key_bits=8, name="connect4_tt_demo")
+        tt.put(0b1111000010101010, 100)
+        print(f"Created: {tt.created}, attached: {not other.created}")
+        print(f"Get via second handle: {other.get(0b1111000010101010)}") # 100
+        print(f"Miss: {other.get(0b0000111110101010)}") # 0
+        other.close()
+        tt.close()
+        tt.unlink()
@@ -1,40 +1,134 @@
 import sys
 import os 
+import time
+from contextlib import contextmanager
 from typing import Optional, List 
 try:
 
     from .position import Position
     from .opening_book import OpeningBook
-    from .transposition_table import TranspositionTable
+    from .transposition_table import TranspositionTable, describe_capacity, parse_memory, size_for_memory
     from .move_sorter import MoveSorter 
 except ImportError:
     from position import Position
     from opening_book import OpeningBook
-    from transposition_table import TranspositionTable
+    from transposition_table import TranspositionTable, describe_capacity, parse_memory, size_for_memory
     from move_sorter import MoveSorter
 
 
+class SearchAborted(Exception):
+    """Raised by negamax when the budget set with Solver.set_budget() runs out."""
+
+
 class Solver:
     INVALID_MOVE = -1000 
-
-    def __init__(self):
-        """Khởi tạo Solver."""
+    DRIVERS = ("bisection", "mtdf")
+    ENDGAME_EMPTY_CELLS = 10 # Ngưỡng mặc định cho endgame(), chọn bằng benchmark (6..18 ô trống)
+    _COLUMN_MASKS = [Position.column_mask(c) for c in range(Position.WIDTH)]
+    _BUDGET_CHECK_INTERVAL = 1024 # Số node giữa hai lần kiểm tra đồng hồ
+    _NO_CHECK = 1 << 62
+
+    def __init__(self, trans_table=None, use_zugzwang: bool = False, driver: str = "bisection",
+                 use_etc: bool = False, endgame_threshold: Optional[int] = None,
+                 memory_budget=None, workers: int = 1):
+        """
+        Khởi tạo Solver.
+        trans_table: bảng chuyển vị dùng sẵn (ví dụ SharedTranspositionTable dùng chung giữa
+        các worker); mặc định tạo TranspositionTable riêng cho process.
+        use_zugzwang: dùng cận trên claimeven (Position.claimeven_bound) để cắt tỉa sớm; tắt mặc định
+            vì chưa có benchmark cho thấy nhanh hơn (25 thế cờ 18-30 nước: 18.48 s so với 18.42 s).
+        driver: vòng lặp null-window của solve(): "bisection" (chia đôi khoảng điểm) hoặc "mtdf".
+        use_etc: enhanced transposition cutoffs, tra TT cho từng nước con trước khi đệ quy.
+        endgame_threshold: khi còn <= số ô trống này, negamax chuyển sang endgame() (0 = tắt).
+        memory_budget: bộ nhớ cho TT của cả máy (số byte, "512M", "2G" hoặc "auto"), chia đều cho
+        `workers` process; None giữ kích thước mặc định 2^24 / key 32 bit.
+        """
+        if driver not in Solver.DRIVERS:
+            raise ValueError(f"Unknown driver '{driver}', expected one of {Solver.DRIVERS}")
+        self.driver = driver
+        self.null_window_passes = 0 # Số lần gọi negamax cửa sổ rỗng từ solve()
+        self.previous_best: Optional[tuple] = None # (nb_moves, điểm tốt nhất) của lần analyze() trước
         self.node_count = 0
+        # Thống kê tra cứu TT / book, dùng cho metrics
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.book_probes = 0
+        self.book_hits = 0
+        self.use_zugzwang = use_zugzwang
+        self.zugzwang_cuts = 0 # Số node kết thúc sớm nhờ cận claimeven
+        self.use_etc = use_etc
+        self.endgame_threshold = Solver.ENDGAME_EMPTY_CELLS if endgame_threshold is None else endgame_threshold
+        self._endgame_moves = Position.WIDTH * Position.HEIGHT - self.endgame_threshold
+        self.etc_probes = 0 # Số lần tra TT thêm cho nước con (ETC)
+        self.etc_cutoffs = 0 # Số node cắt được nhờ ETC (mỗi lần bỏ qua cả cây con)
         self.column_order = [0] * Position.WIDTH
         for i in range(Position.WIDTH):
             self.column_order[i] = Position.WIDTH // 2 + (1 - 2 * (i % 2)) * (i + 1) // 2
 
 
+        log_size, key_bits = 24, 32
+        if trans_table is None and memory_budget is not None: # ValueError nếu ngân sách không hợp lệ
+            log_size, key_bits = size_for_memory(parse_memory(memory_budget), workers)
+            print(describe_capacity(log_size, key_bits, workers), file=sys.stderr)
         try:
-             self.trans_table = TranspositionTable(log_size=24, partial_key_bits=32)
+             self.trans_table = trans_table if trans_table is not None else TranspositionTable(log_size=log_size, partial_key_bits=key_bits)
         except Exception as e:
              print(f"Critical Error: Failed to initialize TranspositionTable: {e}", file=sys.stderr)
              self.trans_table = None # Hoặc raise exception
 
         self.book: Optional[OpeningBook] = None
 
-    def load_book(self, filename: str):
-        """Tải opening book từ file được chỉ định."""
+        # Ngân sách tìm kiếm (mặc định không giới hạn), xem set_budget()
+        self.node_budget: Optional[int] = None
+        self.deadline: Optional[float] = None
+        self._next_check = Solver._NO_CHECK
+
+    def set_budget(self, max_nodes: Optional[int] = None, max_seconds: Optional[float] = None):
+        """
+        Limits the following searches to `max_nodes` nodes (counted from the
+        current node_count) and/or `max_seconds` of wall time from now; negamax
+        raises SearchAborted once either is exceeded. Call with no arguments
+        to remove the limit (call it after reset_stats()). Entries already
+        stored in the TT stay valid.
+        """
+        self.node_budget = self.node_count + max_nodes if max_nodes is not None else None
+        self.deadline = time.perf_counter() + max_seconds if max_seconds is not None else None
+        self._next_check = Solver._NO_CHECK
+        if self.deadline is not None:
+            self._next_check = self.node_count + Solver._BUDGET_CHECK_INTERVAL
+        if self.node_budget is not None:
+            self._next_check = min(self._next_check, self.node_budget)
+
+    def _check_budget(self):
+        if self.node_budget is not None and self.node_count >= self.node_budget:
+            raise SearchAborted(f"node budget exhausted ({self.node_count} nodes)")
+        if self.deadline is not None:
+            if time.perf_counter() >= self.deadline:
+                raise SearchAborted(f"time budget exhausted ({self.node_count} nodes)")
+            self._next_check = self.node_count + Solver._BUDGET_CHECK_INTERVAL
+            if self.node_budget is not None:
+                self._next_check = min(self._next_check, self.node_budget)
+
+    @contextmanager
+    def profile(self, prefix: str = "profile", sample_interval: float = 0.001):
+        """
+        Profiles the with-block: cProfile data, hot-path call counts and stack
+        samples, written to <prefix>.stats / .txt / .collapsed on exit (profiling.py).
+        """
+        try:
+            from .profiling import SolverProfiler
+        except ImportError:
+            from profiling import SolverProfiler
+        table_class = type(self.trans_table) if self.trans_table is not None else TranspositionTable
+        profiler = SolverProfiler(prefix, sample_interval, table_class)
+        try:
+            with profiler.active():
+                yield profiler
+        finally:
+            profiler.write()
+
+    def load_book(self, filename: str, use_mmap: bool = False):
+        """Tải opening book từ file được chỉ định (use_mmap: map file chỉ-đọc, dùng chung giữa các process)."""
         # Kiểm tra file tồn tại trước để có thông báo lỗi tốt hơn
         if not os.path.exists(filename):
             print(f"Solver: Opening book file not found: {filename}", file=sys.stderr)
@@ -44,7 +138,7 @@ class Solver:
         print(f"Solver: Attempting to load book: {filename}", file=sys.stderr)
         # Truyền width/height từ hằng số của Position
         temp_book = OpeningBook(width=Position.WIDTH, height=Position.HEIGHT)
-        if temp_book.load(filename):
+        if temp_book.load(filename, use_mmap=use_mmap):
             self.book = temp_book # Gán book nếu load thành công
             print(f"Solver: Successfully loaded book '{filename}', depth={getattr(self.book, 'depth', 'N/A')}", file=sys.stderr)
         else:
@@ -60,6 +154,32 @@ class Solver:
         """Returns the number of nodes explored."""
         return self.node_count
 
+    def reset_stats(self):
+        """Resets the node count and the TT / book lookup counters."""
+        self.node_count = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.book_probes = 0
+        self.book_hits = 0
+        self.zugzwang_cuts = 0
+        self.etc_probes = 0
+        self.etc_cutoffs = 0
+        self.null_window_passes = 0
+
+    def get_stats(self) -> dict:
+        """Returns the search counters accumulated since the last reset_stats()."""
+        return {
+            "nodes": self.node_count,
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "book_probes": self.book_probes,
+            "book_hits": self.book_hits,
+            "zugzwang_cuts": self.zugzwang_cuts,
+            "etc_probes": self.etc_probes,
+            "etc_cutoffs": self.etc_cutoffs,
+            "null_window_passes": self.null_window_passes,
+        }
+
     # --- Cập nhật negamax để sử dụng Opening Book ---
     def negamax(self, p: Position, alpha: int, beta: int) -> int:
         """
@@ -82,7 +202,12 @@ class Solver:
         if p.nb_moves() >= Position.WIDTH * Position.HEIGHT - 2:
             return 0
 
+        if p.nb_moves() >= self._endgame_moves: # Ít ô trống: tìm kiếm vét cạn không TT
+            return self.endgame(p.current_position, p.mask, p.nb_moves(), alpha, beta)
+
         self.node_count += 1
+        if self.node_count >= self._next_check: # Chỉ khi có ngân sách (set_budget)
+            self._check_budget()
 
         min_bound = -(Position.WIDTH * Position.HEIGHT - 2 - p.nb_moves()) // 2 # Điểm thấp nhất có thể (đối phương không thắng ngay)
         if alpha < min_bound:
@@ -94,12 +219,31 @@ class Solver:
             beta = max_bound
             if alpha >= beta: return beta
 
+        # Cận trên zugzwang: đối thủ giữ mọi ô hàng chẵn bằng claimeven
+        if self.use_zugzwang:
+            zugzwang_bound = p.claimeven_bound()
+            if zugzwang_bound is not None:
+                if beta > zugzwang_bound:
+                    beta = zugzwang_bound
+                    if alpha >= beta:
+                        self.zugzwang_cuts += 1
+                        return beta
+            else:
+                # Một cột lẻ duy nhất: đi vào đó rồi chính mình giữ claimeven -> cận dưới
+                zugzwang_bound = p.claimeven_lower_bound()
+                if zugzwang_bound is not None and alpha < zugzwang_bound:
+                    alpha = zugzwang_bound
+                    if alpha >= beta:
+                        self.zugzwang_cuts += 1
+                        return alpha
 
         key = p.key()
         # Kiểm tra TT có được khởi tạo không
         if self.trans_table:
+            self.tt_probes += 1
             tt_value = self.trans_table.get(key)
-            if tt_value != 0: 
+            if tt_value != 0:
+                self.tt_hits += 1
                 if tt_value > Position.MAX_SCORE - Position.MIN_SCORE + 1:  # Lower Bound stored
                     min_bound_tt = tt_value + 2 * Position.MIN_SCORE - Position.MAX_SCORE - 2
                     if alpha < min_bound_tt:
@@ -112,13 +256,31 @@ class Solver:
                         if alpha >= beta: return beta
 
         if self.book and self.book.is_loaded:
+            self.book_probes += 1
             book_value = self.book.get(p) # Trả về giá trị đã chuẩn hóa hoặc 0
             if book_value != 0: # Nếu tìm thấy trong book và trong độ sâu cho phép
+                self.book_hits += 1
 
                 actual_score = book_value + Position.MIN_SCORE - 1
                 # Trả về ngay lập tức vì book chứa kết quả chính xác
                 return actual_score
 
+        # --- Enhanced transposition cutoffs: cận trên của một nước con trong TT đủ để cắt beta ---
+        if self.use_etc and self.trans_table:
+            child_position = p.current_position ^ p.mask
+            remaining = possible
+            while remaining:
+                move = remaining & -remaining
+                remaining ^= move
+                self.etc_probes += 1
+                child_value = self.trans_table.get(child_position + (p.mask | move)) # key() của nước con
+                if 0 < child_value <= Position.MAX_SCORE - Position.MIN_SCORE + 1: # Upper bound của nước con
+                    score = -(child_value + Position.MIN_SCORE - 1)
+                    if score >= beta:
+                        self.etc_cutoffs += 1
+                        self.trans_table.put(key, score + Position.MAX_SCORE - 2 * Position.MIN_SCORE + 2)
+                        return score
+
         # --- Khám phá nước đi ---
         moves = MoveSorter()
         for i in range(Position.WIDTH -1, -1, -1):
@@ -153,8 +315,55 @@ class Solver:
 
         return alpha 
 
-    def solve(self, p: Position, weak: bool = False) -> int:
+    def endgame(self, position: int, mask: int, moves: int, alpha: int, beta: int) -> int:
+        """
+        Negamax for nearly full boards on raw bitboards (position = stones of
+        the player to move): no TT, no book, no move sorting, just the
+        non-losing moves in centre-first order. Same contract as negamax().
+        """
+        self.node_count += 1
+        if self.node_count >= self._next_check:
+            self._check_budget()
+
+        board_cells = Position.WIDTH * Position.HEIGHT
+        # possible_non_losing_moves() viết lại trên số nguyên
+        possible = (mask + Position.BOTTOM_MASK) & Position.BOARD_MASK
+        opponent_win = Position.compute_winning_position(position ^ mask, mask)
+        forced = possible & opponent_win
+        if forced:
+            if forced & (forced - 1): return -(board_cells - moves) // 2
+            possible = forced
+        possible &= ~(opponent_win >> 1)
+        if possible == 0:
+            return -(board_cells - moves) // 2
+        if moves >= board_cells - 2:
+            return 0
 
+        min_bound = -(board_cells - 2 - moves) // 2
+        if alpha < min_bound:
+            alpha = min_bound
+            if alpha >= beta: return alpha
+        max_bound = (board_cells - 1 - moves) // 2
+        if beta > max_bound:
+            beta = max_bound
+            if alpha >= beta: return beta
+
+        opponent = position ^ mask
+        for col in self.column_order:
+            move = possible & Solver._COLUMN_MASKS[col]
+            if move:
+                score = -self.endgame(opponent, mask | move, moves + 1, -beta, -alpha)
+                if score >= beta:
+                    return score
+                if score > alpha:
+                    alpha = score
+        return alpha
+
+    def solve(self, p: Position, weak: bool = False, guess: Optional[int] = None) -> int:
+        """
+        Exact score of `p` (or -1/0/1 when weak). `guess` is only used by the
+        MTD(f) driver, as a first guess when neither the book nor the TT has one.
+        """
         if p.can_win_next():
              return (Position.WIDTH * Position.HEIGHT + 1 - p.nb_moves()) // 2
 
@@ -165,6 +374,9 @@ class Solver:
             min_score = -1
             max_score = 1
 
+        if self.driver == "mtdf":
+            return self.mtdf(p, min_score, max_score, self.first_guess(p, guess))
+
         while min_score < max_score:
             med = min_score + (max_score - min_score) // 2
             if med <= 0 and min_score // 2 < med: med = min_score // 2
@@ -172,15 +384,53 @@ class Solver:
 
 
             r = self.negamax(p, med, med + 1)
+            self.null_window_passes += 1
 
             if r <= med: max_score = r
             else: min_score = r
 
         return min_score
 
+    def first_guess(self, p: Position, fallback: Optional[int] = None) -> int:
+        """
+        Starting point for MTD(f): the book score if `p` is in the book, else
+        the bound stored in the TT for `p`, else `fallback` (e.g. the previous
+        score in the same game), else 0.
+        """
+        if self.book and self.book.is_loaded:
+            book_value = self.book.get(p)
+            if book_value != 0:
+                return book_value + Position.MIN_SCORE - 1
+        if self.trans_table:
+            tt_value = self.trans_table.get(p.key())
+            if tt_value != 0:
+                if tt_value > Position.MAX_SCORE - Position.MIN_SCORE + 1: # Lower bound
+                    return tt_value + 2 * Position.MIN_SCORE - Position.MAX_SCORE - 2
+                return tt_value + Position.MIN_SCORE - 1 # Upper bound
+        return fallback if fallback is not None else 0
+
+    def mtdf(self, p: Position, min_score: int, max_score: int, guess: int) -> int:
+        """
+        MTD(f): null-window searches around the current guess, each one moving
+        the lower or upper bound to the returned value, until they meet.
+        """
+        g = max(min_score, min(max_score, guess))
+        while min_score < max_score:
+            beta = max(g, min_score + 1) # Cửa sổ [beta - 1, beta]
+            g = self.negamax(p, beta - 1, beta)
+            self.null_window_passes += 1
+            if g < beta: max_score = g
+            else: min_score = g
+        return min_score
+
 
     def analyze(self, p: Position, weak: bool = False) -> list[int]:
 
+        # Đoán điểm cho MTD(f): điểm tốt nhất của lần analyze trước nếu đó là nước trước của cùng người chơi
+        guess = None
+        if self.previous_best is not None and self.previous_best[0] == p.nb_moves() - 2:
+            guess = -self.previous_best[1]
+
         scores = [Solver.INVALID_MOVE] * Position.WIDTH
         for col in range(Position.WIDTH):
             if p.can_play(col):
@@ -190,6 +440,9 @@ class Solver:
                     p2 = p.copy()
                     p2.play_col(col)
                
-                    scores[col] = -self.solve(p2, weak)
+                    scores[col] = -self.solve(p2, weak, guess)
+        valid = [s for s in scores if s != Solver.INVALID_MOVE]
+        if valid and not weak:
+            self.previous_best = (p.nb_moves(), max(valid))
         return scores
 
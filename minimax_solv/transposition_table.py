@@ -1,5 +1,9 @@
 import math
-from typing import Optional, List
+import os
+import sys
+import struct
+from array import array
+from typing import Optional, List, Tuple
 
 def _is_prime(n: int) -> bool:
     """Basic primality test."""
@@ -38,14 +42,18 @@ class TranspositionTable:
         if not isinstance(partial_key_bits, int) or partial_key_bits <= 0:
             raise ValueError("partial_key_bits must be a positive integer")
 
-        target_size = 1 << log_size
-        self.size: int = _next_prime(target_size)
+        self.size: int = TranspositionTable.prime_size(log_size)
         self.partial_key_bits: int = partial_key_bits
         self.partial_key_mask: int = (1 << partial_key_bits) - 1
 
         self.keys: List[Optional[int]] = [None] * self.size
         self.values: List[int] = [0] * self.size
 
+    @staticmethod
+    def prime_size(log_size: int) -> int:
+        """Number of slots of a table created with `log_size` (smallest prime >= 2^log_size)."""
+        return _next_prime(1 << log_size)
+
     def _index(self, key: int) -> int:
         """Calculates the hash index for a given key."""
         return key % self.size 
@@ -85,6 +93,156 @@ class TranspositionTable:
         """Returns the allocated size (number of slots) of the table."""
         return self.size
 
+    def fill_ratio(self, samples: int = 4096) -> float:
+        """
+        Estimates the fraction of occupied slots by probing `samples`
+        evenly spaced slots (exact when the table is smaller than that).
+        """
+        if self.size <= samples:
+            return sum(1 for k in self.keys if k is not None) / self.size
+        step = self.size // samples
+        used = sum(1 for i in range(0, step * samples, step) if self.keys[i] is not None)
+        return used / samples
+
+    def save_snapshot(self, filename: str) -> int:
+        """
+        Writes the occupied slots to `filename` (atomically, via a temp file).
+        Returns the number of entries written.
+        """
+        indices = [i for i, k in enumerate(self.keys) if k is not None]
+        return write_snapshot(filename, self.size, self.partial_key_bits, indices,
+                              (self.keys[i] for i in indices), (self.values[i] for i in indices))
+
+    def load_snapshot(self, filename: str) -> int:
+        """
+        Restores entries saved by save_snapshot(). The snapshot must have been
+        taken from a table with the same size and key width; otherwise a
+        ValueError is raised and the table is left untouched.
+        Returns the number of entries restored.
+        """
+        indices, keys, values = read_snapshot(filename, self.size, self.partial_key_bits)
+        table_keys = self.keys; table_values = self.values
+        for i, k, v in zip(indices, keys, values):
+            table_keys[i] = k
+            table_values[i] = v
+        return len(indices)
+
+
+# --- Snapshot: chỉ lưu các ô đã dùng (index, partial key, value) ---
+_SNAPSHOT_MAGIC = b"C4TT"
+_SNAPSHOT_HEADER = '<4sBQBQ' # magic, version, size, partial_key_bits, entry count
+
+def write_snapshot(filename: str, size: int, partial_key_bits: int, indices, keys, values) -> int:
+    """Writes packed index / key / value arrays to `filename` via a temp file."""
+    indices = array('I', indices)
+    keys = array('I' if partial_key_bits <= 32 else 'Q', keys)
+    values = array('B', values)
+    tmp_name = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp_name, 'wb') as f:
+        f.write(struct.pack(_SNAPSHOT_HEADER, _SNAPSHOT_MAGIC, 1, size, partial_key_bits, len(indices)))
+        for arr in (indices, keys, values):
+            if sys.byteorder != 'little': arr.byteswap()
+            arr.tofile(f)
+    os.replace(tmp_name, filename)
+    return len(indices)
+
+def read_snapshot(filename: str, size: int, partial_key_bits: int):
+    """Reads a snapshot, checking it was taken from a table of the same geometry."""
+    header_size = struct.calcsize(_SNAPSHOT_HEADER)
+    with open(filename, 'rb') as f:
+        header = f.read(header_size)
+        if len(header) < header_size:
+            raise ValueError("Truncated snapshot header")
+        magic, version, file_size, key_bits, count = struct.unpack(_SNAPSHOT_HEADER, header)
+        if magic != _SNAPSHOT_MAGIC or version != 1:
+            raise ValueError("Not a transposition table snapshot")
+        if file_size != size or key_bits != partial_key_bits:
+            raise ValueError(f"Snapshot geometry (size={file_size}, key_bits={key_bits}) does not match "
+                             f"table (size={size}, key_bits={partial_key_bits})")
+        indices = array('I'); keys = array('I' if key_bits <= 32 else 'Q'); values = array('B')
+        for arr in (indices, keys, values):
+            arr.fromfile(f, count) # EOFError nếu file bị cắt
+            if sys.byteorder != 'little': arr.byteswap()
+    return indices, keys, values
+
+
+# --- Kích thước bảng theo ngân sách bộ nhớ ---
+FULL_KEY_BITS = 49 # key = current_position + mask < 2^(WIDTH*(HEIGHT+1)) trên bàn 7x6
+ENTRY_BYTES = 48 # TranspositionTable: 2 con trỏ list + một int của partial key (đo bằng tracemalloc)
+SHARED_ENTRY_BYTES = 8 # SharedTranspositionTable: một uint64 (key << 8 | value) mỗi slot
+MIN_LOG_SIZE = 10
+MAX_LOG_SIZE = 32
+AUTO_MEMORY_FRACTION = 0.5 # "auto": dành một nửa bộ nhớ của máy / container cho TT
+_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def host_memory() -> Optional[int]:
+    """Bytes of memory usable by this process: the cgroup limit inside a container, else physical RAM."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                text = f.read().strip()
+        except OSError:
+            continue
+        if text.isdigit() and int(text) < (1 << 60): # "max" / giá trị khổng lồ = không giới hạn
+            return int(text)
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def parse_memory(text) -> int:
+    """
+    Parses a memory budget: bytes as an int, a size such as "512M", "2G",
+    "1.5GiB", or "auto" (AUTO_MEMORY_FRACTION of host_memory()).
+    """
+    if isinstance(text, int):
+        return text
+    spec = str(text).strip().upper()
+    if spec == "AUTO":
+        total = host_memory()
+        if total is None:
+            raise ValueError("Cannot determine host memory for 'auto', give an explicit size")
+        return int(total * AUTO_MEMORY_FRACTION)
+    spec = spec.removesuffix("IB").removesuffix("B")
+    unit = spec[-1:] if spec[-1:] in _UNITS else ""
+    try:
+        value = float(spec[:len(spec) - len(unit)])
+    except ValueError:
+        raise ValueError(f"Invalid memory size '{text}', expected e.g. 512M, 2G or auto") from None
+    if value <= 0:
+        raise ValueError(f"Memory size must be positive, got '{text}'")
+    return int(value * _UNITS[unit])
+
+
+def size_for_memory(budget_bytes: int, workers: int = 1, shared: bool = False) -> Tuple[int, int]:
+    """
+    (log_size, partial_key_bits) of the largest table that fits `budget_bytes`.
+    Private tables split the budget between `workers` processes, a shared
+    table is allocated once per host. The partial key keeps just enough bits
+    for key % size and the stored bits to identify the key (size is a prime
+    >= 2^log_size), so a smaller table stores wider keys and stays lossless.
+    """
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    entry_bytes = SHARED_ENTRY_BYTES if shared else ENTRY_BYTES
+    per_table = budget_bytes if shared else budget_bytes // workers
+    log_size = MIN_LOG_SIZE
+    while log_size < MAX_LOG_SIZE and TranspositionTable.prime_size(log_size + 1) * entry_bytes <= per_table:
+        log_size += 1
+    return log_size, max(FULL_KEY_BITS - log_size, 8)
+
+
+def describe_capacity(log_size: int, partial_key_bits: int, workers: int = 1, shared: bool = False) -> str:
+    """One log line with the slot count and the estimated memory of a table configuration."""
+    size = TranspositionTable.prime_size(log_size)
+    table_mb = size * (SHARED_ENTRY_BYTES if shared else ENTRY_BYTES) / (1 << 20)
+    copies = 1 if shared else workers
+    return (f"TT capacity: {size} entries (2^{log_size}), {partial_key_bits}-bit keys, "
+            f"~{table_mb:.0f} MB {'shared' if shared else 'per worker'} x {copies} = ~{table_mb * copies:.0f} MB")
+
+
 # Example Usage
 if __name__ == "__main__":
     tt = TranspositionTable(log_size=4, partial_key_bits=8)
@@ -117,4 +275,9 @@ if __name__ == "__main__":
     tt.reset()
     print(f"\nAfter Reset:")
     print(f"Get Key1: {tt.get(key1)}")
-    print(f"Get Key2: {tt.get(key2)}")
\ No newline at end of file
+    print(f"Get Key2: {tt.get(key2)}")
+
+    print()
+    for budget in ("512M", "4G", "64G"):
+        log_size, key_bits = size_for_memory(parse_memory(budget), workers=4)
+        print(f"{budget} / 4 workers: {describe_capacity(log_size, key_bits, workers=4)}")
\ No newline at end of file
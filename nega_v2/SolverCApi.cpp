@@ -0,0 +1,73 @@
+// C API cho Solver, dùng từ Python qua ctypes (xem c4solver.py)
+// Build: g++ SolverCApi.cpp Solver.cpp -o libc4solver.so -shared -fPIC -std=c++17 -m64 -O2 -Wall
+#include "Position.hpp"
+#include "Solver.hpp"
+#include <vector>
+#include <new>
+
+using namespace GameSolver::Connect4;
+
+namespace {
+
+// board: HEIGHT*WIDTH ô, hàng 0 là hàng TRÊN CÙNG (như API), giá trị 0 / 1 / 2, -1 = ô bị chặn
+bool buildPosition(const int *board, int player, Position &out) {
+    if (board == nullptr || (player != 1 && player != 2)) return false;
+    Position::position_t current = 0, mask = 0, blocked = 0;
+    for (int r = 0; r < Position::HEIGHT; ++r) {
+        for (int c = 0; c < Position::WIDTH; ++c) {
+            int cell = board[r * Position::WIDTH + c];
+            Position::position_t bit = Position::position_t(1) << (c * (Position::HEIGHT + 1) + (Position::HEIGHT - 1 - r));
+            if (cell == -1) blocked |= bit;
+            else if (cell == 1 || cell == 2) {
+                mask |= bit;
+                if (cell == player) current |= bit;
+            }
+            else if (cell != 0) return false;
+        }
+    }
+    out = Position(current, mask, blocked);
+    return true;
+}
+
+}
+
+extern "C" {
+
+int c4_width() { return Position::WIDTH; }
+int c4_height() { return Position::HEIGHT; }
+int c4_invalid_move() { return Solver::INVALID_MOVE; }
+
+void *c4_solver_new() {
+    return new (std::nothrow) Solver();
+}
+
+void c4_solver_free(void *solver) {
+    delete static_cast<Solver *>(solver);
+}
+
+void c4_solver_reset(void *solver) {
+    static_cast<Solver *>(solver)->reset();
+}
+
+unsigned long long c4_solver_node_count(void *solver) {
+    return static_cast<Solver *>(solver)->getNodeCount();
+}
+
+// Trả về 0 nếu thành công, -1 nếu board / player không hợp lệ
+int c4_solve(void *solver, const int *board, int player, int weak, int *score_out) {
+    Position P;
+    if (!buildPosition(board, player, P)) return -1;
+    *score_out = static_cast<Solver *>(solver)->solve(P, weak != 0);
+    return 0;
+}
+
+// scores_out: WIDTH phần tử, INVALID_MOVE cho cột không đi được
+int c4_analyze(void *solver, const int *board, int player, int weak, int *scores_out) {
+    Position P;
+    if (!buildPosition(board, player, P)) return -1;
+    std::vector<int> scores = static_cast<Solver *>(solver)->analyze(P, weak != 0);
+    for (int c = 0; c < Position::WIDTH; ++c) scores_out[c] = scores[c];
+    return 0;
+}
+
+}
@@ -10,14 +10,34 @@ from contextlib import asynccontextmanager
 import sys 
 import time 
 import fcntl
+from fastapi.concurrency import run_in_threadpool
+from request_log import RequestRecorder
+from c4solver import NativeSolver
 
 C_PROCESS_EXEC = "./InteractiveSolver" 
 cpp_process: Optional[subprocess.Popen] = None
+# SOLVER_BACKEND=native: gọi Solver C++ trong process qua ctypes (libc4solver.so) thay vì pipe tới InteractiveSolver
+SOLVER_BACKEND = os.environ.get("SOLVER_BACKEND", "process")
+native_solver: Optional[NativeSolver] = None
+recorder = RequestRecorder.from_env() # Ghi lại request khi đặt REQUEST_LOG=<path>, replay bằng minimax_solv/replay.py
 
 # lifespan giữ nguyên như phiên bản trước (đã có sửa lỗi stderr None và non-blocking read)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global cpp_process
+    global cpp_process, native_solver
+    if SOLVER_BACKEND == "native":
+        try:
+            native_solver = NativeSolver()
+            print("App startup: native C++ solver loaded in-process.")
+        except (OSError, subprocess.CalledProcessError, MemoryError) as e:
+            print(f"Failed to load native solver ({e}); falling back to {C_PROCESS_EXEC}.", file=sys.stderr)
+    if native_solver is not None:
+        yield
+        native_solver.close()
+        if recorder is not None:
+            recorder.close()
+        print("App shutdown complete.")
+        return
     print(f"App startup: Starting C++ process {C_PROCESS_EXEC}...")
     cpp_ready = False
     try:
@@ -110,6 +130,8 @@ async def lifespan(app: FastAPI):
             print(f"Error stopping C++ process gracefully: {e}. Attempting to kill.", file=sys.stderr)
             try: cpp_process.kill()
             except Exception as e_kill: print(f"Error killing C++ process: {e_kill}", file=sys.stderr)
+    if recorder is not None:
+        recorder.close()
     print("App shutdown complete.")
 
 
@@ -125,6 +147,8 @@ app.add_middleware(
 
 @app.get("/api/test")
 async def health_check():
+    if native_solver is not None:
+        return {"status": "ok", "message": "Python server is running with the in-process C++ solver."}
     if cpp_process and cpp_process.poll() is None:
         return {"status": "ok", "message": "Python server is running and C++ process is active."}
     elif cpp_process and cpp_process.poll() is not None:
@@ -133,6 +157,11 @@ async def health_check():
         return {"status": "error", "message": "Python server is running but C++ process is not available/failed to start."}
 
 
+def record_request(request_data: "GameStateRequest", elapsed_s: float, move: Optional[int]):
+    if recorder is not None:
+        recorder.record(request_data.board, request_data.current_player, request_data.valid_moves,
+                        elapsed_s * 1000, move=move, is_new_game=request_data.is_new_game)
+
 # SỬA LẠI PYDANTIC MODEL CHO REQUEST ĐỂ KHỚP YÊU CẦU CỦA NỀN TẢNG KIỂM THỬ
 class GameStateRequest(BaseModel):
     board: List[List[int]] 
@@ -148,6 +177,7 @@ class AIResponse(BaseModel):
 @app.post("/api/connect4-move", response_model=AIResponse) # SỬA THÀNH ĐƯỜNG DẪN MÀ NỀN TẢNG GỢI Ý
 async def get_ai_move_endpoint(request_data: GameStateRequest = Body(...)):
     request_received_time = time.time()
+    selected_move: Optional[int] = None
     print(f"Received request for /api/connect4-move for player {request_data.current_player}", file=sys.stderr)
 
     print(f"Received request for /api/get_ai_move for player {request_data.current_player}", file=sys.stderr)
@@ -174,7 +204,7 @@ async def get_ai_move_endpoint(request_data: GameStateRequest = Body(...)):
     sys.stderr.flush() # Đảm bảo log được in ra ngay
     # --- KẾT THÚC PHẦN IN TRẠNG THÁI BÀN CỜ ---
 
-    if cpp_process is None or cpp_process.poll() is not None:
+    if native_solver is None and (cpp_process is None or cpp_process.poll() is not None):
         # ... (xử lý lỗi cpp_process không chạy như cũ) ...
         print("C++ process is not running or has exited. Cannot get AI move.", file=sys.stderr)
         raise HTTPException(status_code=503, detail="AI service backend not available or has exited.")
@@ -191,6 +221,7 @@ async def get_ai_move_endpoint(request_data: GameStateRequest = Body(...)):
         end_time_req_early = time.time()
         print(f"Total request processing time (early exit): {(end_time_req_early - request_received_time)*1000:.2f} ms", file=sys.stderr)
         sys.stderr.flush()
+        record_request(request_data, end_time_req_early - request_received_time, selected_move)
         return AIResponse(move=selected_move)
     r1, c1, r2, c2 = 0,0,0,0 
     if len(removed_cells_found) == 1:
@@ -206,6 +237,23 @@ async def get_ai_move_endpoint(request_data: GameStateRequest = Body(...)):
              print(f"Found 2 removed cells: ({r1},{c1}) & ({r2},{c2}).", file=sys.stderr)
     else: 
         print(f"Found 0 removed cells. Using default ({r1},{c1}) & ({r2},{c2}) for C++.", file=sys.stderr)
+
+    if native_solver is not None:
+        # Gọi thẳng Solver C++ (nhả GIL khi tìm kiếm); mọi ô -1 trên board đều được coi là ô bị chặn
+        try:
+            scores = await run_in_threadpool(native_solver.analyze, request_data.board, request_data.current_player)
+            selected_move = native_solver.pick_best(scores)
+            print(f"Native solver scores: {scores} ({native_solver.last_nodes} nodes)", file=sys.stderr)
+            if selected_move is None:
+                raise HTTPException(status_code=500, detail="AI calculation error: no playable column.")
+            print(f"AI (Player {request_data.current_player}) chose column: {selected_move}", file=sys.stderr)
+            return AIResponse(move=selected_move)
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=f"Invalid game state: {ve}")
+        finally:
+            end_time_req = time.time()
+            print(f"Total request processing time for player {request_data.current_player}: {(end_time_req - request_received_time)*1000:.2f} ms", file=sys.stderr)
+            record_request(request_data, end_time_req - request_received_time, selected_move)
     
     try:
         cpp_process.stdin.write("GET_MOVE\n")
@@ -287,6 +335,7 @@ async def get_ai_move_endpoint(request_data: GameStateRequest = Body(...)):
     finally:
         end_time_req = time.time()
         print(f"Total request processing time for player {request_data.current_player}: {(end_time_req - request_received_time)*1000:.2f} ms", file=sys.stderr)
+        record_request(request_data, end_time_req - request_received_time, selected_move)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+import ctypes
+import os
+import subprocess
+import sys
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+# Thư viện C++ (Solver.cpp + SolverCApi.cpp) gọi qua ctypes: không qua pipe, không serialise.
+# ctypes nhả GIL trong lúc gọi hàm C, nên các thread Python khác vẫn chạy khi solver đang tìm kiếm.
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+LIB_PATH = os.environ.get("C4_SOLVER_LIB", os.path.join(SRC_DIR, "libc4solver.so"))
+SOURCES = ["SolverCApi.cpp", "Solver.cpp"]
+HEADERS = ["Position.hpp", "Solver.hpp", "TranspositionTable.hpp", "MoveSorter.hpp"]
+BUILD_CMD = ["g++", *SOURCES, "-o", LIB_PATH, "-shared", "-fPIC", "-std=c++17", "-m64", "-O2", "-Wall"]
+
+_lib = None
+_lib_lock = threading.Lock()
+
+
+def build(force: bool = False) -> str:
+    """Biên dịch thư viện bằng g++ nếu chưa có hoặc cũ hơn mã nguồn. Trả về đường dẫn thư viện."""
+    sources = [os.path.join(SRC_DIR, f) for f in SOURCES + HEADERS]
+    if not force and os.path.exists(LIB_PATH):
+        lib_mtime = os.path.getmtime(LIB_PATH)
+        if all(not os.path.exists(s) or os.path.getmtime(s) <= lib_mtime for s in sources):
+            return LIB_PATH
+    print(f"Building {LIB_PATH}: {' '.join(BUILD_CMD)}", file=sys.stderr)
+    subprocess.run(BUILD_CMD, cwd=SRC_DIR, check=True)
+    return LIB_PATH
+
+
+def load_library(auto_build: bool = True) -> ctypes.CDLL:
+    global _lib
+    with _lib_lock:
+        if _lib is not None:
+            return _lib
+        if auto_build and all(os.path.exists(os.path.join(SRC_DIR, f)) for f in SOURCES):
+            build()
+        lib = ctypes.CDLL(LIB_PATH)
+        int_p = ctypes.POINTER(ctypes.c_int)
+        lib.c4_solver_new.restype = ctypes.c_void_p
+        lib.c4_solver_free.argtypes = [ctypes.c_void_p]
+        lib.c4_solver_reset.argtypes = [ctypes.c_void_p]
+        lib.c4_solver_node_count.argtypes = [ctypes.c_void_p]
+        lib.c4_solver_node_count.restype = ctypes.c_ulonglong
+        lib.c4_solve.argtypes = [ctypes.c_void_p, int_p, ctypes.c_int, ctypes.c_int, int_p]
+        lib.c4_analyze.argtypes = [ctypes.c_void_p, int_p, ctypes.c_int, ctypes.c_int, int_p]
+        _lib = lib
+        return lib
+
+
+class NativeSolver:
+    """
+    In-process wrapper around the nega_v2 C++ Solver. Boards use the API
+    format: board[0] is the top row, cells are 0 / 1 / 2 and -1 for blocked
+    cells (extra cells can also be passed as `blocked` (row, col) pairs).
+    One C++ Solver (with its own transposition table) per instance; calls on
+    the same instance are serialised, use several instances for parallelism.
+    """
+
+    def __init__(self, auto_build: bool = True):
+        self._lib = load_library(auto_build)
+        self.WIDTH = self._lib.c4_width()
+        self.HEIGHT = self._lib.c4_height()
+        self.INVALID_MOVE = self._lib.c4_invalid_move()
+        self.column_order = [self.WIDTH // 2 + (1 - 2 * (i % 2)) * (i + 1) // 2 for i in range(self.WIDTH)]
+        self._handle = self._lib.c4_solver_new()
+        if not self._handle:
+            raise MemoryError("Cannot allocate C++ Solver")
+        self._lock = threading.Lock()
+        self.last_nodes = 0
+
+    def _board_array(self, board: Sequence[Sequence[int]], blocked: Optional[Sequence[Tuple[int, int]]]):
+        if len(board) != self.HEIGHT or any(len(row) != self.WIDTH for row in board):
+            raise ValueError(f"Invalid board dimensions: {len(board)}x{len(board[0]) if board else 'N/A'}")
+        cells = [cell for row in board for cell in row]
+        for r, c in blocked or ():
+            if not (0 <= r < self.HEIGHT and 0 <= c < self.WIDTH):
+                raise ValueError(f"Invalid blocked cell ({r},{c})")
+            cells[r * self.WIDTH + c] = -1
+        return (ctypes.c_int * len(cells))(*cells)
+
+    def analyze(self, board, current_player: int, weak: bool = False,
+                blocked: Optional[Sequence[Tuple[int, int]]] = None) -> List[int]:
+        """Score of every column (INVALID_MOVE for unplayable ones), like Solver::analyze."""
+        cells = self._board_array(board, blocked)
+        scores = (ctypes.c_int * self.WIDTH)()
+        with self._lock:
+            before = self._lib.c4_solver_node_count(self._handle)
+            rc = self._lib.c4_analyze(self._handle, cells, current_player, int(weak), scores)
+            self.last_nodes = self._lib.c4_solver_node_count(self._handle) - before
+        if rc != 0:
+            raise ValueError(f"Invalid board or current_player {current_player}")
+        return list(scores)
+
+    def solve(self, board, current_player: int, weak: bool = False,
+              blocked: Optional[Sequence[Tuple[int, int]]] = None) -> int:
+        cells = self._board_array(board, blocked)
+        score = ctypes.c_int()
+        with self._lock:
+            before = self._lib.c4_solver_node_count(self._handle)
+            rc = self._lib.c4_solve(self._handle, cells, current_player, int(weak), ctypes.byref(score))
+            self.last_nodes = self._lib.c4_solver_node_count(self._handle) - before
+        if rc != 0:
+            raise ValueError(f"Invalid board or current_player {current_player}")
+        return score.value
+
+    def best_move(self, board, current_player: int, weak: bool = False,
+                  blocked: Optional[Sequence[Tuple[int, int]]] = None) -> Optional[int]:
+        """Best column as InteractiveSolver picks it (centre first on ties), None if no column is playable."""
+        return self.pick_best(self.analyze(board, current_player, weak, blocked))
+
+    def pick_best(self, scores: Sequence[int]) -> Optional[int]:
+        best_col, best_score = None, None
+        for col in self.column_order:
+            if scores[col] != self.INVALID_MOVE and (best_score is None or scores[col] > best_score):
+                best_col, best_score = col, scores[col]
+        return best_col
+
+    def reset(self):
+        """Clears the transposition table and the node counter."""
+        with self._lock:
+            self._lib.c4_solver_reset(self._handle)
+
+    def close(self):
+        with self._lock:
+            if self._handle:
+                self._lib.c4_solver_free(self._handle)
+                self._handle = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+if __name__ == "__main__":
+    # python c4solver.py --build : chỉ biên dịch; không tham số: giải thử một thế cờ có ô bị chặn
+    if len(sys.argv) > 1 and sys.argv[1] == "--build":
+        print(build(force=True))
+        sys.exit(0)
+    import time
+    demo = [[0] * 7 for _ in range(6)]
+    demo[5][3] = 1; demo[4][3] = 2; demo[5][2] = 1; demo[5][4] = 2
+    demo[0][0] = -1
+    solver = NativeSolver()
+    t0 = time.perf_counter()
+    demo_scores = solver.analyze(demo, 1, weak=True)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    print(f"Scores: {demo_scores}")
+    print(f"Best move: {solver.pick_best(demo_scores)} ({solver.last_nodes} nodes, {elapsed_ms:.1f} ms)")
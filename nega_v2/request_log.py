@@ -0,0 +1,103 @@
+import sys
+import os
+import json
+import time
+import threading
+from typing import Iterator, List, Optional
+
+# Mỗi ô của board được mã hoá bằng một ký tự, board 6x7 thành chuỗi 42 ký tự (hàng trên cùng trước)
+_CELL_TO_CHAR = {0: "0", 1: "1", 2: "2", -1: "x"}
+_CHAR_TO_CELL = {c: v for v, c in _CELL_TO_CHAR.items()}
+
+
+def encode_board(board: List[List[int]]) -> str:
+    """Encodes an API board (list of rows) as one compact string, rows separated by '/'."""
+    return "/".join("".join(_CELL_TO_CHAR.get(cell, "?") for cell in row) for row in board)
+
+
+def decode_board(text: str) -> List[List[int]]:
+    """Inverse of encode_board."""
+    return [[_CHAR_TO_CELL[ch] for ch in row] for row in text.split("/")]
+
+
+class RequestRecorder:
+    """
+    Opt-in recorder for move requests. Appends one compact JSON line per
+    request: the payload (board, player, valid moves), the move served and
+    the latency the server measured. Enabled by setting REQUEST_LOG=<path>.
+    """
+
+    ENV_VAR = "REQUEST_LOG"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", buffering=1, encoding="utf-8")
+        self.count = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["RequestRecorder"]:
+        path = os.environ.get(cls.ENV_VAR)
+        if not path:
+            return None
+        try:
+            recorder = cls(path)
+        except OSError as e:
+            print(f"Warning: Cannot open request log '{path}': {e}. Recording disabled.", file=sys.stderr)
+            return None
+        print(f"Recording move requests to '{path}'.", file=sys.stderr)
+        return recorder
+
+    def record(self, board: List[List[int]], current_player: int, valid_moves: List[int],
+               latency_ms: float, move: Optional[int] = None, is_new_game: Optional[bool] = None):
+        entry = {
+            "t": round(time.time(), 3),
+            "ms": round(latency_ms, 3),
+            "p": current_player,
+            "b": encode_board(board),
+            "v": "".join(str(c) for c in valid_moves),
+        }
+        if is_new_game is not None:
+            entry["n"] = int(is_new_game)
+        if move is not None:
+            entry["m"] = move
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_log(path: str) -> Iterator[dict]:
+    """
+    Reads a request log and yields entries with the request payload decoded,
+    ready to be posted back to /api/connect4-move:
+        {"payload": {...}, "latency_ms": float, "move": int | None, "time": float}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+                payload = {
+                    "board": decode_board(entry["b"]),
+                    "current_player": entry["p"],
+                    "valid_moves": [int(c) for c in entry["v"]],
+                }
+                if "n" in entry:
+                    payload["is_new_game"] = bool(entry["n"])
+            except (ValueError, KeyError) as e:
+                print(f"Line {line_num}: invalid request log entry skipped ({e})", file=sys.stderr)
+                continue
+            yield {
+                "payload": payload,
+                "latency_ms": entry.get("ms"),
+                "move": entry.get("m"),
+                "time": entry.get("t"),
+            }